@@ -1,40 +1,1025 @@
 # app.py - Fixed and Enhanced Version for Render.com
-from flask import Flask, request, jsonify, render_template_string, redirect
+from flask import Flask, Response, request, jsonify, redirect, send_file, g, has_request_context
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import unquote_etag
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from limits import parse, parse_many
 import os
-from datetime import datetime
+import atexit
+from datetime import datetime, timezone
 import hashlib
+import hmac
 import json
 import requests
 from functools import wraps
-import re
+from contextlib import contextmanager, nullcontext
 import base64
+import csv
+import gzip
+import io
+import itertools
+import zlib
 import random
 import string
+import sys
+import threading
+import unicodedata
+import sqlite3
+import time
+from collections import OrderedDict, namedtuple
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from types import MappingProxyType
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+import multiprocessing
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+from urllib.parse import quote_plus, urlsplit
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+import extractor
+try:
+    import brotli
+except ImportError:  # optional; responses are then compressed with gzip only
+    brotli = None
+from media_urls import YOUTUBE_ID_RE, canonical_url, classify_url
+from sqlite_storage import SQLiteDatabase  # also registers the sqlite:// limiter storage
+import qr_codes
 
 app = Flask(__name__)
 CORS(app)
 
 # Configuration
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'ntando-store-secret-key-change-in-production')
-app.config['API_KEYS'] = {'demo-key-12345': {'email': 'demo@example.com', 'tier': 'free'}}
+app.config['API_KEYS'] = {'demo-key-12345': {'email': 'demo@example.com', 'tier': 'free'}}  # seeded into the key store
 app.config['UPLOAD_FOLDER'] = '/tmp'
+app.config['DATA_FOLDER'] = os.environ.get('DATA_FOLDER', '/tmp')  # point at a persistent disk in production
+app.config['STORE_PATH'] = os.environ.get('STORE_PATH', os.path.join(app.config['DATA_FOLDER'], 'ntando-store.db'))
+app.config['KEY_CACHE_SIZE'] = int(os.environ.get('KEY_CACHE_SIZE', 10000))
+app.config['KEY_CACHE_TTL'] = int(os.environ.get('KEY_CACHE_TTL', 30))  # upper bound for revocations to reach every worker
+app.config['KEY_NEGATIVE_TTL'] = int(os.environ.get('KEY_NEGATIVE_TTL', 5))
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
 
-# Rate limiting
+# Outbound HTTP client
+app.config['OUTBOUND_POOL_CONNECTIONS'] = int(os.environ.get('OUTBOUND_POOL_CONNECTIONS', 20))  # hosts kept pooled
+app.config['OUTBOUND_POOL_MAXSIZE'] = int(os.environ.get('OUTBOUND_POOL_MAXSIZE', 10))  # connections per host
+app.config['OUTBOUND_CONNECT_TIMEOUT'] = float(os.environ.get('OUTBOUND_CONNECT_TIMEOUT', 3.05))
+app.config['OUTBOUND_READ_TIMEOUT'] = float(os.environ.get('OUTBOUND_READ_TIMEOUT', 10))
+app.config['OUTBOUND_RETRIES'] = int(os.environ.get('OUTBOUND_RETRIES', 2))
+app.config['OUTBOUND_BACKOFF'] = float(os.environ.get('OUTBOUND_BACKOFF', 0.3))
+app.config['FANOUT_WORKERS'] = int(os.environ.get('FANOUT_WORKERS', 16))
+app.config['BULK_MAX_URLS'] = int(os.environ.get('BULK_MAX_URLS', 50))
+app.config['BULK_DEADLINE'] = float(os.environ.get('BULK_DEADLINE', 15))  # seconds per bulk request
+app.config['YOUTUBE_BATCH_MAX'] = int(os.environ.get('YOUTUBE_BATCH_MAX', 50))
+
+# Caching (backend: memory, sqlite or redis)
+app.config['CACHE_BACKEND'] = os.environ.get('CACHE_BACKEND', 'sqlite')
+app.config['CACHE_PATH'] = os.environ.get('CACHE_PATH', os.path.join(app.config['DATA_FOLDER'], 'ntando-cache.db'))
+app.config['CACHE_REDIS_URL'] = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+app.config['OEMBED_CACHE_SIZE'] = int(os.environ.get('OEMBED_CACHE_SIZE', 10000))
+app.config['OEMBED_CACHE_TTL'] = int(os.environ.get('OEMBED_CACHE_TTL', 3600))
+app.config['OEMBED_NEGATIVE_TTL'] = int(os.environ.get('OEMBED_NEGATIVE_TTL', 300))
+app.config['RESPONSE_CACHE_SIZE'] = int(os.environ.get('RESPONSE_CACHE_SIZE', 5000))  # 0 disables
+app.config['RESPONSE_CACHE_TTL'] = int(os.environ.get('RESPONSE_CACHE_TTL', 86400))
+app.config['RESPONSE_MAX_AGE'] = int(os.environ.get('RESPONSE_MAX_AGE', 3600))  # Cache-Control for static API responses
+app.config['PAGE_MAX_AGE'] = int(os.environ.get('PAGE_MAX_AGE', 86400))  # pages only change on deploy
+app.config['PROBE_CACHE_SIZE'] = int(os.environ.get('PROBE_CACHE_SIZE', 5000))
+app.config['PROBE_CACHE_TTL'] = int(os.environ.get('PROBE_CACHE_TTL', 300))
+app.config['BASE64_CACHE_SIZE'] = int(os.environ.get('BASE64_CACHE_SIZE', 200))
+app.config['BASE64_CACHE_TTL'] = int(os.environ.get('BASE64_CACHE_TTL', 600))
+app.config['BASE64_CACHE_MAX_BYTES'] = int(os.environ.get('BASE64_CACHE_MAX_BYTES', 512 * 1024))
+
+# yt-dlp extraction
+app.config['YTDLP_WORKERS'] = int(os.environ.get('YTDLP_WORKERS', 2))
+app.config['YTDLP_TIMEOUT'] = float(os.environ.get('YTDLP_TIMEOUT', 30))
+app.config['YTDLP_FIXTURE_DIR'] = os.environ.get('YTDLP_FIXTURE_DIR', '')  # serve <video_id>.json fixtures instead of YouTube
+app.config['YTDLP_CACHE_SIZE'] = int(os.environ.get('YTDLP_CACHE_SIZE', 2000))
+app.config['YTDLP_CACHE_TTL'] = int(os.environ.get('YTDLP_CACHE_TTL', 3600))  # used when stream URLs carry no expiry
+app.config['YTDLP_EXPIRY_MARGIN'] = int(os.environ.get('YTDLP_EXPIRY_MARGIN', 300))
+
+# Image payloads
+app.config['BASE64_MAX_BYTES'] = int(os.environ.get('BASE64_MAX_BYTES', 10 * 1024 * 1024))
+app.config['BASE64_CHUNK_SIZE'] = 48 * 1024  # multiple of 3, so chunks encode without padding
+app.config['MEDIA_CACHE_DIR'] = os.environ.get('MEDIA_CACHE_DIR', os.path.join(app.config['UPLOAD_FOLDER'], 'media-cache'))
+app.config['MEDIA_CACHE_MAX_BYTES'] = int(os.environ.get('MEDIA_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+app.config['MEDIA_CACHE_MAX_FILE'] = int(os.environ.get('MEDIA_CACHE_MAX_FILE', 25 * 1024 * 1024))
+app.config['MEDIA_CACHE_MAX_AGE'] = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 86400))
+app.config['MEDIA_PROXY_CHUNK_SIZE'] = 64 * 1024
+
+# Response compression
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))  # bytes; smaller bodies go out as-is
+app.config['COMPRESS_MIMETYPES'] = frozenset(os.environ.get(
+    'COMPRESS_MIMETYPES',
+    'application/json,text/html,text/plain,text/css,text/csv,text/javascript,application/javascript,image/svg+xml'
+).split(','))
+app.config['COMPRESS_GZIP_LEVEL'] = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))  # per-request bodies
+app.config['COMPRESS_BR_LEVEL'] = int(os.environ.get('COMPRESS_BR_LEVEL', 4))
+
+# Weather (Open-Meteo needs no API key)
+app.config['WEATHER_FIXTURE'] = os.environ.get('WEATHER_FIXTURE', '')  # serve cities from this JSON file instead of Open-Meteo
+app.config['WEATHER_FORECAST_URL'] = os.environ.get('WEATHER_FORECAST_URL', 'https://api.open-meteo.com/v1/forecast')
+app.config['WEATHER_GEOCODING_URL'] = os.environ.get('WEATHER_GEOCODING_URL', 'https://geocoding-api.open-meteo.com/v1/search')
+app.config['WEATHER_CACHE_SIZE'] = int(os.environ.get('WEATHER_CACHE_SIZE', 5000))
+app.config['WEATHER_MIN_TTL'] = int(os.environ.get('WEATHER_MIN_TTL', 60))  # when the provider is late with its next update
+app.config['GEOCODE_CACHE_SIZE'] = int(os.environ.get('GEOCODE_CACHE_SIZE', 20000))
+app.config['GEOCODE_CACHE_TTL'] = int(os.environ.get('GEOCODE_CACHE_TTL', 30 * 86400))
+app.config['GEOCODE_NEGATIVE_TTL'] = int(os.environ.get('GEOCODE_NEGATIVE_TTL', 3600))
+app.config['WEATHER_BATCH_MAX'] = int(os.environ.get('WEATHER_BATCH_MAX', 100))
+
+# Currency rates
+app.config['CURRENCY_SOURCE'] = os.environ.get('CURRENCY_SOURCE', '')  # JSON/CSV file or http(s) feed; built-in table when empty
+app.config['CURRENCY_BASE'] = os.environ.get('CURRENCY_BASE', 'USD').upper()  # for CSV sources, which carry no base
+app.config['CURRENCY_REFRESH_INTERVAL'] = float(os.environ.get('CURRENCY_REFRESH_INTERVAL', 3600))
+app.config['CURRENCY_RETRY_INTERVAL'] = float(os.environ.get('CURRENCY_RETRY_INTERVAL', 60))  # after a failed refresh
+app.config['CURRENCY_BATCH_MAX'] = int(os.environ.get('CURRENCY_BATCH_MAX', 5000))
+
+# QR codes
+app.config['QR_DEFAULT_SIZE'] = int(os.environ.get('QR_DEFAULT_SIZE', 300))  # pixels, quiet zone included
+app.config['QR_MAX_SIZE'] = int(os.environ.get('QR_MAX_SIZE', 1000))
+app.config['QR_MATRIX_CACHE_SIZE'] = int(os.environ.get('QR_MATRIX_CACHE_SIZE', 1000))  # encoded symbols, reused across sizes and formats
+app.config['QR_MATRIX_CACHE_TTL'] = int(os.environ.get('QR_MATRIX_CACHE_TTL', 86400))
+
+# Metrics (gunicorn.conf.py sets PROMETHEUS_MULTIPROC_DIR so /metrics covers every worker)
+app.config['METRICS_MAX_HOSTS'] = int(os.environ.get('METRICS_MAX_HOSTS', 50))  # distinct upstream host labels per worker
+
+# URL shortener
+app.config['SHORT_URL_BASE'] = os.environ.get('SHORT_URL_BASE', 'https://ntando.store').rstrip('/')
+app.config['SHORT_URL_CACHE_SIZE'] = int(os.environ.get('SHORT_URL_CACHE_SIZE', 50000))  # hot codes per worker
+app.config['SHORT_URL_CACHE_TTL'] = int(os.environ.get('SHORT_URL_CACHE_TTL', 3600))
+app.config['SHORT_URL_NEGATIVE_TTL'] = int(os.environ.get('SHORT_URL_NEGATIVE_TTL', 5))  # how long an unknown code stays unknown
+app.config['SHORT_URL_MAX_LENGTH'] = int(os.environ.get('SHORT_URL_MAX_LENGTH', 2048))
+app.config['SHORTEN_BULK_MAX'] = int(os.environ.get('SHORTEN_BULK_MAX', 100))
+app.config['CLICK_FLUSH_INTERVAL'] = float(os.environ.get('CLICK_FLUSH_INTERVAL', 10))  # seconds between click flushes
+app.config['CLICK_FLUSH_MAX_KEYS'] = int(os.environ.get('CLICK_FLUSH_MAX_KEYS', 5000))  # flush early past this many rollup rows
+app.config['CLICK_BUFFER_MAX_KEYS'] = int(os.environ.get('CLICK_BUFFER_MAX_KEYS', 50000))  # oldest rows dropped past this while flushes fail
+app.config['CLICK_STATS_MAX_HOURS'] = int(os.environ.get('CLICK_STATS_MAX_HOURS', 24 * 90))
+
+# Tracing and profiling
+app.config['TRACING'] = os.environ.get('TRACING', 'header')  # off, header (requests sending X-Trace: 1) or all
+app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN', '')  # admin endpoints are disabled while empty
+app.config['PROFILE_MAX_SECONDS'] = float(os.environ.get('PROFILE_MAX_SECONDS', 60))
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', os.path.join(app.config['DATA_FOLDER'], 'ntando-profiles'))  # shared by all workers
+app.config['PROFILE_KEEP'] = int(os.environ.get('PROFILE_KEEP', 20))  # completed profiles kept on disk
+app.config['ADMIN_AUTH_FAILURE_LIMIT'] = os.environ.get('ADMIN_AUTH_FAILURE_LIMIT', '10 per hour')  # bad tokens per IP
+
+# Health checks
+app.config['READY_PROBE_INTERVAL'] = float(os.environ.get('READY_PROBE_INTERVAL', 5))  # seconds between dependency probes
+app.config['READY_POOL_SATURATION'] = float(os.environ.get('READY_POOL_SATURATION', 0.9))  # busiest outbound pool
+
+# Rate limiting (storage: sqlite://<path>, redis://... or memory://); only redis:// keeps checks under 1 ms p99 under contention
+app.config['RATELIMIT_STORAGE_URI'] = os.environ.get(
+    'RATELIMIT_STORAGE_URI', 'sqlite://' + os.path.join(app.config['DATA_FOLDER'], 'ntando-ratelimit.db'))
+app.config['RATELIMIT_STRATEGY'] = os.environ.get('RATELIMIT_STRATEGY', 'sliding-window-counter')  # or fixed-window
+app.config['RATELIMIT_DEFAULT'] = os.environ.get('RATELIMIT_DEFAULT', '200 per day;50 per hour')  # per IP, non-API routes
+app.config['INTERNAL_RATE_LIMIT'] = os.environ.get('INTERNAL_RATE_LIMIT', '100 per second')  # per internal-tier key, all groups
+
+# ==============================================
+# METRICS
+# ==============================================
+
+REQUESTS_TOTAL = Counter(
+    'ntando_http_requests_total', 'HTTP requests by route, method and status',
+    ['route', 'method', 'status']
+)
+REQUEST_DURATION = Histogram(
+    'ntando_http_request_duration_seconds', 'Time to produce a response, by route',
+    ['route', 'method']
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'ntando_http_requests_in_flight', 'Requests currently being handled',
+    multiprocess_mode='livesum'
+)
+UPSTREAM_REQUESTS = Counter(
+    'ntando_upstream_requests_total', 'Outbound HTTP requests by host and outcome',
+    ['host', 'outcome']
+)
+UPSTREAM_DURATION = Histogram(
+    'ntando_upstream_request_duration_seconds', 'Outbound HTTP latency until response headers, by host',
+    ['host']
+)
+CACHE_LOOKUPS = Counter(
+    'ntando_cache_lookups_total', 'Cache lookups by cache and result (hit or miss)',
+    ['cache', 'result']
+)
+RATE_LIMITED = Counter(
+    'ntando_rate_limited_total', 'Requests rejected with 429, by key tier and endpoint group',
+    ['tier', 'group']
+)
+
+_upstream_hosts = set()
+
+def upstream_host_label(url):
+    """Host label for upstream metrics; caller-supplied image URLs could otherwise add unbounded series"""
+    host = urlsplit(url).hostname or 'unknown'
+    if host in _upstream_hosts:
+        return host
+    if len(_upstream_hosts) < app.config['METRICS_MAX_HOSTS']:
+        _upstream_hosts.add(host)
+        return host
+    return 'other'
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is not None:
+        # Route templates, not paths, so IDs in URLs do not create new series
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUESTS_TOTAL.labels(route, request.method, response.status_code).inc()
+        REQUEST_DURATION.labels(route, request.method).observe(time.perf_counter() - started)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if g.pop('request_started', None) is not None:
+        REQUESTS_IN_FLIGHT.dec()
+
+def metrics_registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+# ==============================================
+# TRACING
+# ==============================================
+
+@contextmanager
+def span(name):
+    """Time a block into the current request's Server-Timing header, if it is being traced"""
+    spans = g.get('trace_spans') if has_request_context() else None
+    if spans is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans.append((name, (time.perf_counter() - started) * 1000))
+
+class TracingJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        with span('json'):
+            return super().dumps(obj, **kwargs)
+
+app.json = TracingJSONProvider(app)
+
+@app.before_request
+def start_trace():
+    mode = app.config['TRACING']
+    if mode == 'all' or (mode == 'header' and request.headers.get('X-Trace') == '1'):
+        g.trace_spans = []
+
+@app.after_request
+def add_server_timing(response):
+    spans = g.get('trace_spans')
+    if spans is None:
+        return response
+    totals = {}
+    for name, duration in spans:
+        total, calls = totals.get(name, (0.0, 0))
+        totals[name] = (total + duration, calls + 1)
+    entries = [
+        f'{name};dur={total:.3f}' + (f';desc="{calls} calls"' if calls > 1 else '')
+        for name, (total, calls) in totals.items()
+    ]
+    started = g.get('request_started')
+    if started is not None:
+        entries.append(f'total;dur={(time.perf_counter() - started) * 1000:.3f}')
+    response.headers['Server-Timing'] = ', '.join(entries)
+    return response
+
+# ==============================================
+# BACKGROUND THREADS
+# ==============================================
+
+class WorkerThread:
+    """
+    A daemon thread that runs target once per process. Threads do not
+    survive fork, so ensure() starts a fresh one the first time it is
+    called in each gunicorn worker; after that it is a single comparison.
+    """
+
+    def __init__(self, target, name):
+        self.target = target
+        self.name = name
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                threading.Thread(target=self.target, name=self.name, daemon=True).start()
+                self._pid = os.getpid()
+
+# ==============================================
+# OUTBOUND HTTP CLIENT
+# ==============================================
+
+# Pool reuse counters: a hit is a checkout that got an already-open
+# connection, a miss had to dial a new TCP/TLS connection.
+OUTBOUND_STATS = {'requests': 0, 'pool_hits': 0, 'pool_misses': 0, 'errors': 0}
+_outbound_stats_lock = threading.Lock()
+
+def _count_outbound(stat):
+    with _outbound_stats_lock:
+        OUTBOUND_STATS[stat] += 1
+
+class _CountingPoolMixin:
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout=timeout)
+        _count_outbound('pool_hits' if getattr(conn, 'sock', None) is not None else 'pool_misses')
+        return conn
+
+class CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+class CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+class PooledHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': CountingHTTPConnectionPool,
+            'https': CountingHTTPSConnectionPool
+        }
+
+# Set by outbound_deadline() for the requests a thread makes inside it
+_outbound_deadline = threading.local()
+
+class DeadlineRetry(Retry):
+    """Retry policy that stops retrying once the calling thread's outbound deadline has passed"""
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        deadline = getattr(_outbound_deadline, 'at', None)
+        if deadline is not None and time.monotonic() >= deadline:
+            raise MaxRetryError(_pool, url, error or ResponseError('Deadline exceeded'))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+def create_http_session():
+    retry = DeadlineRetry(
+        total=app.config['OUTBOUND_RETRIES'],
+        backoff_factor=app.config['OUTBOUND_BACKOFF'],
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False
+    )
+    adapter = PooledHTTPAdapter(
+        pool_connections=app.config['OUTBOUND_POOL_CONNECTIONS'],
+        pool_maxsize=app.config['OUTBOUND_POOL_MAXSIZE'],
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.headers['User-Agent'] = 'NtandoStoreAPI/1.0'
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+http_session = create_http_session()
+
+@contextmanager
+def outbound_deadline(deadline):
+    """Cap the timeouts of outbound requests made in this thread so they end by deadline (time.monotonic())"""
+    previous = getattr(_outbound_deadline, 'at', None)
+    _outbound_deadline.at = deadline if previous is None else min(previous, deadline)
+    try:
+        yield
+    finally:
+        _outbound_deadline.at = previous
+
+def outbound_request(method, url, read_timeout=None, **kwargs):
+    """Send a request through the shared keep-alive pool"""
+    timeout = kwargs.pop('timeout', None) or (
+        app.config['OUTBOUND_CONNECT_TIMEOUT'],
+        read_timeout or app.config['OUTBOUND_READ_TIMEOUT']
+    )
+    deadline = getattr(_outbound_deadline, 'at', None)
+    if deadline is not None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.Timeout('Deadline exceeded')
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        timeout = (min(connect, remaining), min(read, remaining))
+    kwargs['timeout'] = timeout
+    _count_outbound('requests')
+    host = upstream_host_label(url)
+    started = time.perf_counter()
+    try:
+        with span('upstream'):
+            response = http_session.request(method, url, **kwargs)
+    except requests.RequestException:
+        _count_outbound('errors')
+        UPSTREAM_REQUESTS.labels(host, 'error').inc()
+        if deadline is not None and time.monotonic() >= deadline:
+            raise requests.Timeout('Deadline exceeded') from None
+        raise
+    finally:
+        UPSTREAM_DURATION.labels(host).observe(time.perf_counter() - started)
+    UPSTREAM_REQUESTS.labels(host, f'{response.status_code // 100}xx').inc()
+    return response
+
+def outbound_get(url, **kwargs):
+    return outbound_request('GET', url, **kwargs)
+
+def outbound_head(url, **kwargs):
+    kwargs.setdefault('allow_redirects', False)
+    return outbound_request('HEAD', url, **kwargs)
+
+def content_length(headers):
+    """Content-Length as an int, or None when it is missing or malformed"""
+    try:
+        length = int(headers.get('content-length', ''))
+    except ValueError:
+        return None
+    return length if length >= 0 else None
+
+def outbound_pool_usage():
+    """Checked-out connections across the per-host pools, and the busiest pool's saturation"""
+    in_use = hosts = 0
+    saturation = 0.0
+    for adapter in set(http_session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None or pool.pool is None:
+                continue
+            busy = pool.pool.maxsize - pool.pool.qsize()
+            in_use += busy
+            hosts += 1
+            saturation = max(saturation, busy / pool.pool.maxsize)
+    return {'hosts': hosts, 'in_use': in_use, 'saturation': round(saturation, 4)}
+
+# Bounded pool shared by every endpoint that fans out to several upstreams
+fanout_executor = ThreadPoolExecutor(
+    max_workers=app.config['FANOUT_WORKERS'],
+    thread_name_prefix='fanout'
+)
+
+def fan_out(func, items, deadline):
+    """Run func over items concurrently, returning (item, result, error) in input order"""
+    expires = time.monotonic() + deadline
+    
+    def run(item):
+        # cancel() cannot stop a call already running, so its outbound
+        # requests time out by the deadline instead of holding this thread
+        with outbound_deadline(expires):
+            return func(item)
+    
+    futures = [fanout_executor.submit(run, item) for item in items]
+    with span('fanout'):
+        wait(futures, timeout=deadline)
+    results = []
+    for item, future in zip(items, futures):
+        if not future.done():
+            future.cancel()
+            results.append((item, None, 'Deadline exceeded'))
+        elif future.exception() is not None:
+            results.append((item, None, str(future.exception())))
+        else:
+            results.append((item, future.result(), None))
+    return results
+
+def outbound_stats():
+    with _outbound_stats_lock:
+        stats = dict(OUTBOUND_STATS)
+    checkouts = stats['pool_hits'] + stats['pool_misses']
+    stats['pool_hit_ratio'] = round(stats['pool_hits'] / checkouts, 4) if checkouts else None
+    stats['pool_maxsize'] = app.config['OUTBOUND_POOL_MAXSIZE']
+    return stats
+
+# ==============================================
+# CACHING
+# ==============================================
+
+_MISSING = object()
+
+def _hit_ratio(hits, misses):
+    lookups = hits + misses
+    return round(hits / lookups, 4) if lookups else None
+
+class MemoryCache:
+    """Thread-safe in-process LRU cache whose entries expire after a TTL"""
+
+    backend = 'memory'
+
+    def __init__(self, name, maxsize, ttl):
+        self.name = name
+        self.maxsize = maxsize
+        self.default_ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[1] > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    CACHE_LOOKUPS.labels(self.name, 'hit').inc()
+                    return entry[0]
+                del self._data[key]
+            self.misses += 1
+            CACHE_LOOKUPS.labels(self.name, 'miss').inc()
+            return default
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def ttl(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[1] - time.monotonic()
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def ping(self):
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': self.backend,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': _hit_ratio(self.hits, self.misses)
+            }
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS cache_expires ON cache (namespace, expires);
+"""
+
+class SQLiteCache:
+    """
+    Cross-process LRU cache stored in a local SQLite file (values must be
+    JSON-serializable). Hits refresh an entry's access time at most once per
+    ACCESS_RESOLUTION seconds, so hot keys don't turn every read into a write.
+    """
+
+    backend = 'sqlite'
+    PURGE_EVERY = 256  # sets between expiry/size sweeps
+    ACCESS_RESOLUTION = 1.0
+
+    def __init__(self, name, maxsize, ttl, path):
+        self.name = name
+        self.maxsize = maxsize
+        self.default_ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._sets = 0
+        self._lock = threading.Lock()
+        self._db = SQLiteDatabase(path, CACHE_SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        # Cache files created before recency tracking lack the accessed column
+        columns = [row[1] for row in self._db.execute('PRAGMA table_info(cache)')]
+        if 'accessed' not in columns:
+            try:
+                self._db.execute('ALTER TABLE cache ADD COLUMN accessed REAL NOT NULL DEFAULT 0')
+            except sqlite3.OperationalError:
+                pass  # another worker added it first
+        self._db.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache (namespace, accessed)')
+
+    def get(self, key, default=None):
+        now = time.time()
+        row = self._db.execute(
+            'SELECT value, accessed FROM cache WHERE namespace = ? AND key = ? AND expires > ?',
+            (self.name, key, now)
+        ).fetchone()
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            CACHE_LOOKUPS.labels(self.name, 'miss').inc()
+            return default
+        if now - row[1] > self.ACCESS_RESOLUTION:
+            self._db.execute('UPDATE cache SET accessed = ? WHERE namespace = ? AND key = ?', (now, self.name, key))
+        with self._lock:
+            self.hits += 1
+        CACHE_LOOKUPS.labels(self.name, 'hit').inc()
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        expires = now + (self.default_ttl if ttl is None else ttl)
+        self._db.execute(
+            'INSERT OR REPLACE INTO cache (namespace, key, value, expires, accessed) VALUES (?, ?, ?, ?, ?)',
+            (self.name, key, json.dumps(value), expires, now)
+        )
+        self._sets += 1
+        if self._sets % self.PURGE_EVERY == 0:
+            self.purge()
+
+    def ttl(self, key):
+        row = self._db.execute(
+            'SELECT expires FROM cache WHERE namespace = ? AND key = ?', (self.name, key)
+        ).fetchone()
+        if row is None or row[0] <= time.time():
+            return None
+        return row[0] - time.time()
+
+    def delete(self, key):
+        self._db.execute('DELETE FROM cache WHERE namespace = ? AND key = ?', (self.name, key))
+
+    def purge(self):
+        """Drop expired rows, then the least recently used rows beyond maxsize"""
+        self._db.execute('DELETE FROM cache WHERE namespace = ? AND expires <= ?', (self.name, time.time()))
+        self._db.execute(
+            'DELETE FROM cache WHERE namespace = ? AND key IN ('
+            'SELECT key FROM cache WHERE namespace = ? ORDER BY accessed DESC LIMIT -1 OFFSET ?)',
+            (self.name, self.name, self.maxsize)
+        )
+
+    def ping(self):
+        self._db.execute('SELECT 1').fetchone()
+        return True
+
+    def stats(self):
+        size = self._db.execute('SELECT COUNT(*) FROM cache WHERE namespace = ?', (self.name,)).fetchone()[0]
+        return {
+            'backend': self.backend,
+            'size': size,
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': _hit_ratio(self.hits, self.misses)
+        }
+
+class RedisCache:
+    """Cache shared through Redis (requires the optional redis package)"""
+
+    backend = 'redis'
+
+    def __init__(self, name, maxsize, ttl, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('CACHE_BACKEND=redis requires the redis package')
+        self.name = name
+        self.maxsize = maxsize  # Redis enforces memory limits through its own maxmemory policy
+        self.default_ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._client = redis.Redis.from_url(url)
+
+    def _key(self, key):
+        return f'ntando:{self.name}:{key}'
+
+    def get(self, key, default=None):
+        raw = self._client.get(self._key(key))
+        if raw is None:
+            with self._lock:
+                self.misses += 1
+            CACHE_LOOKUPS.labels(self.name, 'miss').inc()
+            return default
+        with self._lock:
+            self.hits += 1
+        CACHE_LOOKUPS.labels(self.name, 'hit').inc()
+        return json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        self._client.set(self._key(key), json.dumps(value), px=max(1, int(ttl * 1000)))
+
+    def ttl(self, key):
+        remaining = self._client.pttl(self._key(key))
+        return remaining / 1000 if remaining > 0 else None
+
+    def delete(self, key):
+        self._client.delete(self._key(key))
+
+    def ping(self):
+        return self._client.ping()
+
+    def stats(self):
+        return {
+            'backend': self.backend,
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': _hit_ratio(self.hits, self.misses)
+        }
+
+CACHES = {}
+
+def make_cache(name, maxsize, ttl, backend=None):
+    """Create a named cache on the configured backend"""
+    backend = backend or app.config['CACHE_BACKEND']
+    if backend == 'memory':
+        cache = MemoryCache(name, maxsize, ttl)
+    elif backend == 'sqlite':
+        cache = SQLiteCache(name, maxsize, ttl, app.config['CACHE_PATH'])
+    elif backend == 'redis':
+        cache = RedisCache(name, maxsize, ttl, app.config['CACHE_REDIS_URL'])
+    else:
+        raise ValueError(f'Unknown cache backend: {backend}')
+    CACHES[name] = cache
+    return cache
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {'event': threading.Event(), 'result': None, 'error': None}
+        
+        if not leader:
+            call['event'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+        
+        try:
+            call['result'] = func()
+            return call['result']
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['event'].set()
+
+def cached_fan_out(keys, lookup, load, deadline):
+    """
+    Answer what the cache can, then fetch each remaining unique key once.
+    lookup(key) returns _MISSING when a fetch is needed; misses go through
+    fan_out(load, ...). Returns ({key: (value, cached, error)}, keys fetched).
+    """
+    found = {}
+    misses = []
+    for key in dict.fromkeys(keys):
+        value = lookup(key)
+        if value is _MISSING:
+            misses.append(key)
+        else:
+            found[key] = (value, True, None)
+    for key, value, error in fan_out(load, misses, deadline):
+        found[key] = (value, False, error)
+    return found, len(misses)
+
+# ==============================================
+# RESPONSE COMPRESSION
+# ==============================================
+
+# Server preference when the client rates several encodings equally
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def negotiate_encoding(available=ENCODINGS):
+    """Best content encoding the client accepts from `available`, or None for identity"""
+    if not request.accept_encodings:
+        return None
+    return request.accept_encodings.best_match(available)
+
+def precompress(body):
+    """Identity bytes plus maximum-effort compressed variants, for bodies encoded once and served many times"""
+    variants = {'identity': body}
+    if len(body) >= app.config['COMPRESS_MIN_SIZE']:
+        variants['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            variants['br'] = brotli.compress(body, quality=11)
+    return variants
+
+def variant_response(variants, etag, mimetype, max_age, scope='public'):
+    """Serve the best precompressed variant; each encoding gets its own strong ETag"""
+    encoding = negotiate_encoding(tuple(e for e in ENCODINGS if e in variants)) or 'identity'
+    response = Response(variants[encoding], mimetype=mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+        etag = f'{etag}-{encoding}'
+    if len(variants) > 1:
+        response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'{scope}, max-age={max_age}'
+    return response.make_conditional(request)
+
+# Pre-serialized bodies of responses that depend only on their inputs.
+# Entries hold bytes, so they stay in process memory whatever CACHE_BACKEND is.
+response_cache = make_cache('responses', app.config['RESPONSE_CACHE_SIZE'], app.config['RESPONSE_CACHE_TTL'], backend='memory')
+
+def response_key(endpoint, *inputs):
+    """Cache key for an endpoint's response to already-normalized inputs"""
+    # A JSON array keeps input boundaries intact, so ('a', 'b:c') and ('a:b', 'c') differ
+    return f'{endpoint}:' + hashlib.sha256(json.dumps(inputs).encode()).hexdigest()
+
+def cached_response(key, build, max_age=None, mimetype='application/json'):
+    """Serve the body cached under key, calling build() for a JSON-able object, str or bytes on a miss"""
+    entry = response_cache.get(key)
+    cached = entry is not None
+    
+    if not cached:
+        payload = build()
+        if isinstance(payload, bytes):
+            body = payload
+        else:
+            body = payload.encode() if isinstance(payload, str) else jsonify(payload).get_data()
+        variants = precompress(body) if mimetype in app.config['COMPRESS_MIMETYPES'] else {'identity': body}
+        entry = (variants, hashlib.sha256(body).hexdigest()[:32])
+        response_cache.set(key, entry)
+    
+    variants, etag = entry
+    # API responses sit behind an API key and carry per-key X-RateLimit-* headers, so no shared caches
+    response = variant_response(
+        variants, etag, mimetype, app.config['RESPONSE_MAX_AGE'] if max_age is None else max_age, scope='private'
+    )
+    response.headers['X-Cache'] = 'HIT' if cached else 'MISS'
+    return response
+
+def make_compressor(encoding):
+    if encoding == 'br':
+        return brotli.Compressor(quality=app.config['COMPRESS_BR_LEVEL'])
+    return zlib.compressobj(app.config['COMPRESS_GZIP_LEVEL'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+
+def compress_stream(chunks, encoding):
+    """Compress a streamed body, flushing after each chunk so output keeps pace with input"""
+    compressor = make_compressor(encoding)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            if encoding == 'br':
+                data = compressor.process(chunk) + compressor.flush()
+            else:
+                data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.finish() if encoding == 'br' else compressor.flush()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+@app.after_request
+def compress_response(response):
+    if (
+        request.method == 'HEAD'
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or response.direct_passthrough  # files from send_file
+        or 'Content-Encoding' in response.headers  # precompressed or proxied as-is
+        or response.mimetype not in app.config['COMPRESS_MIMETYPES']
+        or response.cache_control.no_transform
+    ):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+    
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < app.config['COMPRESS_MIN_SIZE']:
+            return response
+        compressor = make_compressor(encoding)
+        if encoding == 'br':
+            response.set_data(compressor.process(body) + compressor.finish())
+        else:
+            response.set_data(compressor.compress(body) + compressor.flush())
+    
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak)
+    return response
+
+# ==============================================
+# RATE LIMITING
+# ==============================================
+
 limiter = Limiter(
     app=app,
     key_func=get_remote_address,
-    default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://"
+    default_limits=[app.config['RATELIMIT_DEFAULT']],
+    # /api/ routes are limited per API key and tier by tier_limit() instead
+    default_limits_exempt_when=lambda: request.path.startswith('/api/'),
+    storage_uri=app.config['RATELIMIT_STORAGE_URI'],
+    strategy=app.config['RATELIMIT_STRATEGY']
 )
 
 # ==============================================
 # AUTHENTICATION
 # ==============================================
 
+KEY_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS api_keys (
+    key_hash TEXT PRIMARY KEY,
+    email TEXT NOT NULL,
+    tier TEXT NOT NULL DEFAULT 'free',
+    created TEXT NOT NULL,
+    revoked TEXT
+) WITHOUT ROWID;
+"""
+
+class APIKeyStore:
+    """
+    API keys persisted in SQLite (looked up by the SHA-256 of the key),
+    fronted by a per-worker LRU so validation stays in memory.
+    """
+
+    def __init__(self, path):
+        self._db = SQLiteDatabase(path, KEY_STORE_SCHEMA)
+        self._cache = make_cache('api_keys', app.config['KEY_CACHE_SIZE'], app.config['KEY_CACHE_TTL'], backend='memory')
+
+    @staticmethod
+    def hash_key(api_key):
+        return hashlib.sha256(api_key.encode()).hexdigest()
+
+    def add(self, api_key, email, tier='free', created=None):
+        key_hash = self.hash_key(api_key)
+        self._db.execute(
+            'INSERT OR IGNORE INTO api_keys (key_hash, email, tier, created) VALUES (?, ?, ?, ?)',
+            (key_hash, email, tier, created or datetime.now().isoformat())
+        )
+        self._cache.delete(key_hash)
+
+    def seed(self, api_key, email, tier='free'):
+        """Add a configured key, or restore it as configured if it exists or was revoked"""
+        key_hash = self.hash_key(api_key)
+        self._db.execute(
+            'INSERT INTO api_keys (key_hash, email, tier, created) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT(key_hash) DO UPDATE SET email = excluded.email, tier = excluded.tier, revoked = NULL',
+            (key_hash, email, tier, datetime.now().isoformat())
+        )
+        self._cache.delete(key_hash)
+
+    def lookup(self, api_key):
+        """Return the key's record, or None if it is unknown or revoked"""
+        key_hash = self.hash_key(api_key)
+        record = self._cache.get(key_hash)
+        if record is not None:
+            return record or None
+        
+        row = self._db.execute(
+            'SELECT email, tier, created FROM api_keys WHERE key_hash = ? AND revoked IS NULL', (key_hash,)
+        ).fetchone()
+        if row is None:
+            self._cache.set(key_hash, False, ttl=app.config['KEY_NEGATIVE_TTL'])
+            return None
+        
+        record = {'key_hash': key_hash, 'email': row[0], 'tier': row[1], 'created': row[2]}
+        self._cache.set(key_hash, record)
+        return record
+
+    def revoke(self, api_key):
+        key_hash = self.hash_key(api_key)
+        revoked = self._db.execute(
+            'UPDATE api_keys SET revoked = ? WHERE key_hash = ? AND revoked IS NULL',
+            (datetime.now().isoformat(), key_hash)
+        ).rowcount
+        # Other workers drop the key once their cached entry expires (KEY_CACHE_TTL)
+        self._cache.delete(key_hash)
+        return revoked > 0
+
+    def ping(self):
+        self._db.execute('SELECT 1').fetchone()
+        return True
+
+key_store = APIKeyStore(app.config['STORE_PATH'])
+for seed_key, seed_info in app.config['API_KEYS'].items():
+    key_store.seed(seed_key, seed_info['email'], seed_info.get('tier', 'free'))
+
 def require_api_key(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -43,13 +1028,143 @@ def require_api_key(f):
         if not api_key:
             return jsonify({'error': 'API key required', 'status': 401}), 401
         
-        if api_key not in app.config['API_KEYS']:
+        with span('auth'):
+            record = key_store.lookup(api_key)
+        if record is None:
             return jsonify({'error': 'Invalid API key', 'status': 401}), 401
         
+        g.api_key = record
+        return f(*args, **kwargs)
+    
+    return decorated_function
+
+ADMIN_AUTH_FAILURES = parse(app.config['ADMIN_AUTH_FAILURE_LIMIT'])
+
+def require_admin_token(f):
+    """Allow only callers presenting ADMIN_TOKEN in X-Admin-Token; repeated bad tokens lock the IP out"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        expected = app.config['ADMIN_TOKEN']
+        if not expected:
+            return jsonify({'error': 'Admin endpoints are disabled (set ADMIN_TOKEN)', 'status': 403}), 403
+        
+        client = get_remote_address()
+        if not limiter.limiter.test(ADMIN_AUTH_FAILURES, 'admin-auth', client):
+            RATE_LIMITED.labels('admin', 'admin-auth').inc()
+            return jsonify({'error': 'Too many invalid admin tokens', 'status': 429}), 429
+        
+        token = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(token.encode(), expected.encode()):
+            limiter.limiter.hit(ADMIN_AUTH_FAILURES, 'admin-auth', client)
+            return jsonify({'error': 'Invalid admin token', 'status': 401}), 401
+        
         return f(*args, **kwargs)
     
     return decorated_function
 
+# Limits per key tier and endpoint group; 'all' applies to every API call
+TIER_LIMITS = {
+    'free': {
+        'all': '50 per hour; 200 per day',
+        'youtube': '20 per minute',
+        'social': '10 per minute',
+        'image': '20 per minute',
+        'ai': '30 per minute',
+        'utilities': '50 per hour'
+    },
+    'premium': {
+        'all': '1000 per hour; 10000 per day',
+        'youtube': '120 per minute',
+        'social': '60 per minute',
+        'image': '120 per minute',
+        'ai': '120 per minute',
+        'utilities': '1000 per hour'
+    },
+    'internal': {
+        'all': app.config['INTERNAL_RATE_LIMIT'],
+        'youtube': '6000 per minute',
+        'social': '6000 per minute',
+        'image': '6000 per minute',
+        'ai': '6000 per minute',
+        'utilities': '6000 per minute'
+    }
+}
+
+# Parsed once at startup: tier -> group -> [(RateLimitItem, scope), ...]
+TIER_POLICIES = {
+    tier: {
+        group: [(item, group) for item in parse_many(spec)] + [(item, 'all') for item in parse_many(groups['all'])]
+        for group, spec in groups.items() if group != 'all'
+    }
+    for tier, groups in TIER_LIMITS.items()
+}
+
+def exhausted_limit(policy, key_hash):
+    """First (item, scope) in policy with no room left for this key, or None"""
+    for item, scope in policy:
+        if not limiter.limiter.test(item, scope, key_hash):
+            return item, scope
+    return None
+
+def tier_limit(group):
+    """Enforce the caller's tier limits for an endpoint group (use after require_api_key)"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            record = g.api_key
+            tier = record['tier'] if record['tier'] in TIER_POLICIES else 'free'
+            key_hash = record['key_hash']
+            policy = TIER_POLICIES[tier][group]
+            rate_limiter = limiter.limiter
+            # sqlite:// runs the whole check in one write transaction; other storages test, then hit
+            transaction = getattr(limiter.storage, 'transaction', nullcontext)
+            
+            with span('limiter'):
+                # Rejections are decided from reads alone; only a likely acceptance opens a transaction
+                rejected = exhausted_limit(policy, key_hash)
+                if rejected is None:
+                    with transaction():
+                        rejected = exhausted_limit(policy, key_hash)
+                        if rejected is None:
+                            # Every limit has room, so a request consumes all of them or none
+                            g.rate_limit = None
+                            for item, scope in policy:
+                                rate_limiter.hit(item, scope, key_hash)
+                                reset, remaining = rate_limiter.get_window_stats(item, scope, key_hash)
+                                # Report the limit closest to running out
+                                if g.rate_limit is None or remaining < g.rate_limit[1]:
+                                    g.rate_limit = (item, remaining, reset)
+                
+                if rejected is not None:
+                    reset, _ = rate_limiter.get_window_stats(*rejected, key_hash)
+                    g.rate_limit = (rejected[0], 0, reset)
+            
+            if rejected is not None:
+                RATE_LIMITED.labels(tier, group).inc()
+                return jsonify({
+                    'error': 'Rate limit exceeded',
+                    'status': 429,
+                    'tier': tier,
+                    'group': group,
+                    'limit': str(rejected[0])
+                }), 429
+            return f(*args, **kwargs)
+        
+        return decorated_function
+    return decorator
+
+@app.after_request
+def add_rate_limit_headers(response):
+    rate_limit = g.get('rate_limit')
+    if rate_limit is not None:
+        item, remaining, reset = rate_limit
+        response.headers['X-RateLimit-Limit'] = str(item.amount)
+        response.headers['X-RateLimit-Remaining'] = str(remaining)
+        response.headers['X-RateLimit-Reset'] = str(int(reset))
+        if response.status_code == 429:
+            response.headers['Retry-After'] = str(max(1, int(reset - time.time())))
+    return response
+
 def generate_api_key(user_id):
     timestamp = str(datetime.now().timestamp())
     raw = f"{user_id}-{timestamp}-{app.config['SECRET_KEY']}"
@@ -188,10 +1303,15 @@ HOME_PAGE = """
                 <p><code>/api/youtube/info?url=YOUTUBE_URL&api_key=YOUR_KEY</code></p>
                 <p>Extract video metadata including title, duration, thumbnail</p>
             </div>
+            <div class="endpoint">
+                <h3><span class="method post">POST</span> YouTube Batch Info <span class="new-badge">NEW</span></h3>
+                <p><code>/api/youtube/info/batch</code></p>
+                <p>Metadata for up to 50 videos in one call (JSON body with urls array of URLs or video IDs)</p>
+            </div>
             <div class="endpoint">
                 <h3><span class="method get">GET</span> YouTube Download Links</h3>
                 <p><code>/api/youtube/download?url=YOUTUBE_URL&format=mp4&api_key=YOUR_KEY</code></p>
-                <p>Get direct download links for YouTube videos (mp4/mp3)</p>
+                <p>Get direct stream URLs (itag, resolution, bitrate, size) for YouTube videos (mp4/mp3)</p>
             </div>
             <div class="endpoint">
                 <h3><span class="method get">GET</span> YouTube Search</h3>
@@ -202,6 +1322,11 @@ HOME_PAGE = """
 
         <div class="api-section">
             <h2>📱 Social Media Downloaders <span class="new-badge">PREMIUM</span></h2>
+            <div class="endpoint">
+                <h3><span class="method get">GET</span> Resolve Any Media URL <span class="new-badge">NEW</span></h3>
+                <p><code>/api/media/resolve?url=MEDIA_URL&api_key=YOUR_KEY</code></p>
+                <p>Detect YouTube, Instagram, TikTok, Facebook or Twitter links and return the canonical ID and download services (cacheable, supports ETag)</p>
+            </div>
             <div class="endpoint">
                 <h3><span class="method get">GET</span> Instagram Downloader</h3>
                 <p><code>/api/instagram/download?url=INSTA_URL&api_key=YOUR_KEY</code></p>
@@ -229,7 +1354,7 @@ HOME_PAGE = """
             <div class="endpoint">
                 <h3><span class="method get">GET</span> Image Downloader</h3>
                 <p><code>/api/image/download?url=IMAGE_URL&api_key=YOUR_KEY</code></p>
-                <p>Download any image from URL with metadata</p>
+                <p>Download any image from URL with metadata. Add <code>&proxy=1</code> to receive the image bytes (supports Range requests)</p>
             </div>
             <div class="endpoint">
                 <h3><span class="method post">POST</span> Bulk Image Download</h3>
@@ -277,19 +1402,41 @@ HOME_PAGE = """
             <div class="endpoint">
                 <h3><span class="method get">GET</span> Weather API</h3>
                 <p><code>/api/weather?city=Harare&api_key=YOUR_KEY</code></p>
+                <p>Current conditions by city name, or by <code>lat</code> and <code>lon</code></p>
+            </div>
+            <div class="endpoint">
+                <h3><span class="method post">POST</span> Batch Weather <span class="new-badge">NEW</span></h3>
+                <p><code>/api/weather/batch</code></p>
+                <p>Current conditions for up to 100 cities at once (JSON body with a cities list)</p>
             </div>
             <div class="endpoint">
                 <h3><span class="method get">GET</span> Currency Converter</h3>
                 <p><code>/api/currency?from=USD&to=ZWL&amount=100&api_key=YOUR_KEY</code></p>
             </div>
+            <div class="endpoint">
+                <h3><span class="method post">POST</span> Batch Currency Converter <span class="new-badge">NEW</span></h3>
+                <p><code>/api/currency/batch</code></p>
+                <p>Convert up to 5000 amounts at once (JSON body with a conversions list of from, to, amount); amount, converted and rate come back as exact decimal strings</p>
+            </div>
             <div class="endpoint">
                 <h3><span class="method get">GET</span> QR Code Generator</h3>
-                <p><code>/api/qrcode?data=YOUR_DATA&api_key=YOUR_KEY</code></p>
+                <p><code>/api/qrcode?data=YOUR_DATA&size=300&ecc=m&format=png&api_key=YOUR_KEY</code></p>
+                <p>Rendered locally as PNG or SVG (format=json returns a data URL); ecc is one of l, m, q, h</p>
             </div>
             <div class="endpoint">
                 <h3><span class="method post">POST</span> URL Shortener</h3>
                 <p><code>/api/shorten</code></p>
-                <p>Shorten long URLs (JSON body with url field)</p>
+                <p>Shorten long URLs (JSON body with url field); short links redirect from <code>/CODE</code></p>
+            </div>
+            <div class="endpoint">
+                <h3><span class="method post">POST</span> Bulk URL Shortener <span class="new-badge">NEW</span></h3>
+                <p><code>/api/shorten/bulk</code></p>
+                <p>Shorten up to 100 URLs at once (JSON body with urls list)</p>
+            </div>
+            <div class="endpoint">
+                <h3><span class="method get">GET</span> Short Link Stats <span class="new-badge">NEW</span></h3>
+                <p><code>/api/shorten/CODE/stats?hours=168&api_key=YOUR_KEY</code></p>
+                <p>Click counts per hour and top referrers for a short link</p>
             </div>
             <div class="endpoint">
                 <h3><span class="method get">GET</span> Random Quote</h3>
@@ -305,13 +1452,16 @@ HOME_PAGE = """
                 <li><strong>Query Parameter:</strong> <code>?api_key=YOUR_KEY</code></li>
             </ul>
             <p><strong>Demo Key:</strong> <code>demo-key-12345</code></p>
+            <p><strong>Revoke a Key:</strong> <code>POST /api/keys/revoke</code> with the key to revoke</p>
         </div>
 
         <div class="api-section">
             <h2>📊 Rate Limits</h2>
             <ul style="margin: 15px 0 15px 20px;">
                 <li>Free Tier: 50 requests/hour, 200 requests/day</li>
-                <li>Premium Tier: Contact for unlimited access</li>
+                <li>Premium Tier: 1000 requests/hour, 10000 requests/day</li>
+                <li>Limits are counted per API key, per endpoint group (YouTube, Social, Image, AI, Utilities)</li>
+                <li>Every response carries <code>X-RateLimit-Limit</code>, <code>X-RateLimit-Remaining</code> and <code>X-RateLimit-Reset</code> headers</li>
             </ul>
         </div>
     </div>
@@ -324,32 +1474,25 @@ HOME_PAGE = """
 </html>
 """
 
+def render_static_page(template):
+    """Render a page once: its bytes per content encoding and a strong ETag"""
+    body = app.jinja_env.from_string(template).render().encode()
+    return {'variants': precompress(body), 'etag': hashlib.sha256(body).hexdigest()[:32]}
+
+def serve_static_page(page):
+    return variant_response(page['variants'], page['etag'], 'text/html', app.config['PAGE_MAX_AGE'])
+
+HOME_PAGE_RENDERED = render_static_page(HOME_PAGE)
+
 @app.route('/')
 def home():
-    return render_template_string(HOME_PAGE)
+    return serve_static_page(HOME_PAGE_RENDERED)
 
 # ==============================================
 # API KEY GENERATION
 # ==============================================
 
-@app.route('/generate-key', methods=['GET', 'POST'])
-def generate_key():
-    if request.method == 'POST':
-        data = request.get_json() if request.is_json else request.form
-        email = data.get('email', 'demo@example.com')
-        api_key = generate_api_key(email)
-        app.config['API_KEYS'][api_key] = {
-            'email': email,
-            'created': datetime.now().isoformat(),
-            'tier': 'free'
-        }
-        return jsonify({
-            'success': True,
-            'api_key': api_key,
-            'message': 'API key generated successfully'
-        })
-    
-    return render_template_string("""
+GENERATE_KEY_PAGE = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -448,27 +1591,81 @@ def generate_key():
         </script>
     </body>
     </html>
-    """)
+    """
+
+GENERATE_KEY_PAGE_RENDERED = render_static_page(GENERATE_KEY_PAGE)
+
+@app.route('/generate-key', methods=['GET', 'POST'])
+def generate_key():
+    if request.method == 'POST':
+        data = request.get_json() if request.is_json else request.form
+        email = data.get('email', 'demo@example.com')
+        api_key = generate_api_key(email)
+        key_store.add(api_key, email)
+        return jsonify({
+            'success': True,
+            'api_key': api_key,
+            'message': 'API key generated successfully'
+        })
+    
+    return serve_static_page(GENERATE_KEY_PAGE_RENDERED)
 
 # ==============================================
 # YOUTUBE APIs - Working Version
 # ==============================================
 
 def extract_video_id(url):
-    patterns = [
-        r'(?:youtube\.com\/watch\?v=|youtu\.be\/)([^&\n?#]+)',
-        r'youtube\.com\/embed\/([^&\n?#]+)',
-        r'youtube\.com\/v\/([^&\n?#]+)'
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
+    ref = classify_url(url)
+    return ref.id if ref is not None and ref.platform == 'youtube' else None
+
+# oEmbed answers these for removed, private or malformed videos
+OEMBED_NEGATIVE_STATUSES = (400, 401, 403, 404)
+
+oembed_cache = make_cache('oembed', app.config['OEMBED_CACHE_SIZE'], app.config['OEMBED_CACHE_TTL'])
+oembed_flight = SingleFlight()
+
+def fetch_oembed(video_id):
+    # Use YouTube oEmbed API (no API key needed)
+    oembed_url = f'https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json'
+    response = outbound_get(oembed_url)
+    
+    if response.status_code == 200:
+        data = response.json()
+        oembed_cache.set(video_id, data)
+        return data
+    
+    if response.status_code in OEMBED_NEGATIVE_STATUSES:
+        oembed_cache.set(video_id, None, ttl=app.config['OEMBED_NEGATIVE_TTL'])
     return None
 
+def youtube_info_fields(video_id, data):
+    return {
+        'video_id': video_id,
+        'title': data.get('title'),
+        'author': data.get('author_name'),
+        'author_url': data.get('author_url'),
+        'thumbnail': data.get('thumbnail_url'),
+        'width': data.get('width'),
+        'height': data.get('height'),
+        'embed_html': data.get('html'),
+        'watch_url': f'https://www.youtube.com/watch?v={video_id}',
+        'embed_url': f'https://www.youtube.com/embed/{video_id}'
+    }
+
+def get_youtube_metadata(video_id):
+    """Return (oEmbed data or None, cache hit) for a video ID"""
+    data = oembed_cache.get(video_id, _MISSING)
+    if data is not _MISSING:
+        return data, True
+    return load_youtube_metadata(video_id), False
+
+def load_youtube_metadata(video_id):
+    """Fetch oEmbed data after a cache miss, coalescing concurrent fetches of one ID"""
+    return oembed_flight.do(video_id, lambda: fetch_oembed(video_id))
+
 @app.route('/api/youtube/info', methods=['GET'])
 @require_api_key
-@limiter.limit("20 per minute")
+@tier_limit('youtube')
 def youtube_info():
     url = request.args.get('url', '')
     
@@ -481,109 +1678,220 @@ def youtube_info():
         return jsonify({'error': 'Invalid YouTube URL', 'status': 400}), 400
     
     try:
-        # Use YouTube oEmbed API (no API key needed)
-        oembed_url = f'https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json'
-        response = requests.get(oembed_url, timeout=10)
+        data, cached = get_youtube_metadata(video_id)
         
-        if response.status_code == 200:
-            data = response.json()
-            return jsonify({
-                'success': True,
-                'video_id': video_id,
-                'title': data.get('title'),
-                'author': data.get('author_name'),
-                'author_url': data.get('author_url'),
-                'thumbnail': data.get('thumbnail_url'),
-                'width': data.get('width'),
-                'height': data.get('height'),
-                'embed_html': data.get('html'),
-                'watch_url': f'https://www.youtube.com/watch?v={video_id}',
-                'embed_url': f'https://www.youtube.com/embed/{video_id}'
-            })
-        else:
-            return jsonify({'error': 'Video not found', 'status': 404}), 404
+        if data is None:
+            return jsonify({'error': 'Video not found', 'status': 404, 'cached': cached}), 404
+        
+        return jsonify({'success': True, **youtube_info_fields(video_id, data), 'cached': cached})
     except Exception as e:
         return jsonify({'error': str(e), 'status': 500}), 500
 
-@app.route('/api/youtube/download', methods=['GET'])
+@app.route('/api/youtube/info/batch', methods=['POST'])
 @require_api_key
-@limiter.limit("10 per minute")
-def youtube_download():
-    url = request.args.get('url', '')
-    format_type = request.args.get('format', 'mp4').lower()
+@tier_limit('youtube')
+def youtube_info_batch():
+    data = request.get_json(silent=True)
+    items = data.get('urls') if isinstance(data, dict) else None
     
-    if not url:
-        return jsonify({'error': 'URL parameter required', 'status': 400}), 400
+    if not isinstance(items, list):
+        return jsonify({'error': 'JSON body with "urls" array required', 'status': 400}), 400
     
-    video_id = extract_video_id(url)
+    max_items = app.config['YOUTUBE_BATCH_MAX']
+    if len(items) > max_items:
+        return jsonify({'error': f'Maximum {max_items} URLs allowed', 'status': 400}), 400
     
-    if not video_id:
-        return jsonify({'error': 'Invalid YouTube URL', 'status': 400}), 400
+    video_ids = [
+        (item if YOUTUBE_ID_RE.fullmatch(item) else extract_video_id(item)) if isinstance(item, str) else None
+        for item in items
+    ]
     
-    # Provide multiple download service options
-    services = {
-        'mp4': [
-            {
-                'name': 'Y2Mate',
-                'url': f'https://www.y2mate.com/youtube/{video_id}',
-                'description': 'Popular video downloader with multiple quality options'
-            },
-            {
-                'name': 'SaveFrom',
-                'url': f'https://en.savefrom.net/#url=https://www.youtube.com/watch?v={video_id}',
-                'description': 'Fast and reliable video downloader'
-            },
-            {
-                'name': '9xBuddy',
-                'url': f'https://9xbuddy.org/process?url=https://www.youtube.com/watch?v={video_id}',
-                'description': 'Download videos in various formats'
-            }
-        ],
-        'mp3': [
-            {
-                'name': 'YTMP3',
-                'url': f'https://ytmp3.nu/watch?v={video_id}',
-                'description': 'Convert YouTube to MP3'
-            },
-            {
-                'name': 'Y2Mate MP3',
-                'url': f'https://www.y2mate.com/youtube-mp3/{video_id}',
-                'description': 'High-quality MP3 converter'
-            },
-            {
-                'name': 'Loader.to',
-                'url': f'https://loader.to/en43/youtube-mp3-downloader.html?v={video_id}',
-                'description': 'Fast MP3 extraction'
-            }
-        ]
-    }
+    found, fetched = cached_fan_out(
+        filter(None, video_ids),
+        lambda video_id: oembed_cache.get(video_id, _MISSING),
+        load_youtube_metadata,
+        app.config['BULK_DEADLINE']
+    )
+    
+    results = []
+    for item, video_id in zip(items, video_ids):
+        if video_id is None:
+            results.append({'input': item, 'success': False, 'error': 'Invalid YouTube URL', 'status': 400})
+            continue
+        metadata, cached, error = found[video_id]
+        if error is not None:
+            results.append({'input': item, 'video_id': video_id, 'success': False, 'error': error, 'status': 502})
+        elif metadata is None:
+            results.append({'input': item, 'video_id': video_id, 'success': False, 'error': 'Video not found',
+                            'status': 404, 'cached': cached})
+        else:
+            results.append({'input': item, 'success': True, **youtube_info_fields(video_id, metadata), 'cached': cached})
     
     return jsonify({
+        'success': True,
+        'total': len(items),
+        'unique': len(found),
+        'fetched': fetched,
+        'results': results
+    })
+
+ytdlp_cache = make_cache('ytdlp', app.config['YTDLP_CACHE_SIZE'], app.config['YTDLP_CACHE_TTL'])
+ytdlp_flight = SingleFlight()
+_ytdlp_pool = None
+_ytdlp_pool_lock = threading.Lock()
+
+def get_ytdlp_pool():
+    # Created on first use, in the worker that needs it; spawned so the
+    # children load only extractor.py and yt-dlp
+    global _ytdlp_pool
+    with _ytdlp_pool_lock:
+        if _ytdlp_pool is None:
+            _ytdlp_pool = ProcessPoolExecutor(
+                max_workers=app.config['YTDLP_WORKERS'],
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _ytdlp_pool
+
+def recycle_ytdlp_pool(pool):
+    """Stop a pool with an extraction stuck past YTDLP_TIMEOUT; the next call starts a fresh one"""
+    global _ytdlp_pool
+    with _ytdlp_pool_lock:
+        if _ytdlp_pool is pool:
+            _ytdlp_pool = None
+    # A running call cannot be cancelled, and left alone it holds its process
+    # for good, so terminate them all; other calls in flight fail and are not cached
+    for process in list((pool._processes or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def fetch_formats(video_id):
+    pool = get_ytdlp_pool()
+    future = pool.submit(extractor.extract_formats, video_id, app.config['YTDLP_FIXTURE_DIR'] or None)
+    try:
+        result = future.result(timeout=app.config['YTDLP_TIMEOUT'])
+    except TimeoutError:
+        recycle_ytdlp_pool(pool)
+        raise
+    
+    # Signed stream URLs stop working at 'expires'; drop the entry a little before that
+    if result['expires']:
+        ttl = result['expires'] - time.time() - app.config['YTDLP_EXPIRY_MARGIN']
+    else:
+        ttl = app.config['YTDLP_CACHE_TTL']
+    if ttl > 0:
+        ytdlp_cache.set(video_id, result, ttl=ttl)
+    return result
+
+def get_youtube_formats(video_id):
+    """Return (extraction result, cache hit) for a video ID"""
+    result = ytdlp_cache.get(video_id)
+    if result is not None:
+        return result, True
+    return ytdlp_flight.do(video_id, lambda: fetch_formats(video_id)), False
+
+def select_formats(formats, format_type):
+    if format_type == 'mp3':
+        return [fmt for fmt in formats if fmt['vcodec'] == 'none']
+    return [fmt for fmt in formats if fmt['vcodec'] != 'none' and fmt['ext'] == format_type] or \
+        [fmt for fmt in formats if fmt['vcodec'] != 'none']
+
+# Third-party converters per output format; {video_id} is filled in per request
+YOUTUBE_SERVICES = {
+    'mp4': [
+        {
+            'name': 'Y2Mate',
+            'url': 'https://www.y2mate.com/youtube/{video_id}',
+            'description': 'Popular video downloader with multiple quality options'
+        },
+        {
+            'name': 'SaveFrom',
+            'url': 'https://en.savefrom.net/#url=https://www.youtube.com/watch?v={video_id}',
+            'description': 'Fast and reliable video downloader'
+        },
+        {
+            'name': '9xBuddy',
+            'url': 'https://9xbuddy.org/process?url=https://www.youtube.com/watch?v={video_id}',
+            'description': 'Download videos in various formats'
+        }
+    ],
+    'mp3': [
+        {
+            'name': 'YTMP3',
+            'url': 'https://ytmp3.nu/watch?v={video_id}',
+            'description': 'Convert YouTube to MP3'
+        },
+        {
+            'name': 'Y2Mate MP3',
+            'url': 'https://www.y2mate.com/youtube-mp3/{video_id}',
+            'description': 'High-quality MP3 converter'
+        },
+        {
+            'name': 'Loader.to',
+            'url': 'https://loader.to/en43/youtube-mp3-downloader.html?v={video_id}',
+            'description': 'Fast MP3 extraction'
+        }
+    ]
+}
+
+def youtube_services(video_id, format_type):
+    services = YOUTUBE_SERVICES.get(format_type, YOUTUBE_SERVICES['mp4'])
+    return [{**service, 'url': service['url'].format(video_id=video_id)} for service in services]
+
+@app.route('/api/youtube/download', methods=['GET'])
+@require_api_key
+@tier_limit('youtube')
+def youtube_download():
+    url = request.args.get('url', '')
+    format_type = request.args.get('format', 'mp4').lower()
+    
+    if not url:
+        return jsonify({'error': 'URL parameter required', 'status': 400}), 400
+    
+    video_id = extract_video_id(url)
+    
+    if not video_id:
+        return jsonify({'error': 'Invalid YouTube URL', 'status': 400}), 400
+    
+    result = {
         'success': True,
         'video_id': video_id,
         'format': format_type,
         'watch_url': f'https://www.youtube.com/watch?v={video_id}',
         'thumbnail': f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg',
-        'download_services': services.get(format_type, services['mp4']),
+        'download_services': youtube_services(video_id, format_type),
         'message': 'Visit any download_services URL to download the video'
-    })
+    }
+    
+    try:
+        extraction, cached = get_youtube_formats(video_id)
+        result.update({
+            'title': extraction['title'],
+            'duration': extraction['duration'],
+            'formats': select_formats(extraction['formats'], format_type),
+            'expires_at': datetime.fromtimestamp(extraction['expires']).isoformat() if extraction['expires'] else None,
+            'cached': cached,
+            'message': 'Download directly from formats[].url before expires_at, or use download_services'
+        })
+    except Exception as e:
+        # Extraction is best effort; the third-party services still work without it
+        result.update({'formats': [], 'extraction_error': str(e) or type(e).__name__})
+    
+    return jsonify(result)
 
 @app.route('/api/youtube/search', methods=['GET'])
 @require_api_key
-@limiter.limit("30 per minute")
+@tier_limit('youtube')
 def youtube_search():
     query = request.args.get('q', '')
     
     if not query:
         return jsonify({'error': 'Query parameter (q) required', 'status': 400}), 400
     
-    # Return search URL and instructions
-    search_url = f'https://www.youtube.com/results?search_query={query.replace(" ", "+")}'
-    
-    return jsonify({
+    # The body echoes the query as sent, so it keys the cache as sent
+    return cached_response(response_key('youtube-search', query), lambda: {
         'success': True,
         'query': query,
-        'search_url': search_url,
+        'search_url': f"https://www.youtube.com/results?search_query={quote_plus(' '.join(query.split()))}",
         'message': 'Use search_url to find videos on YouTube',
         'note': 'For programmatic access, consider using YouTube Data API v3'
     })
@@ -592,169 +1900,465 @@ def youtube_search():
 # SOCIAL MEDIA DOWNLOADERS - Working Implementations
 # ==============================================
 
-@app.route('/api/instagram/download', methods=['GET'])
-@require_api_key
-@limiter.limit("10 per minute")
-def instagram_download():
-    url = request.args.get('url', '')
+# Built once at import; every response shares these lists
+SOCIAL_PLATFORMS = {
+    'instagram': {
+        'name': 'Instagram',
+        'download_services': [
+            {
+                'name': 'SnapInsta',
+                'url': 'https://snapinsta.app/',
+                'description': 'Paste Instagram URL to download',
+                'supports': ['Photos', 'Videos', 'Reels', 'IGTV']
+            },
+            {
+                'name': 'Inflact',
+                'url': 'https://inflact.com/downloader/instagram/photo/',
+                'description': 'Instagram photo and video downloader',
+                'supports': ['Photos', 'Videos', 'Stories']
+            },
+            {
+                'name': 'IG Downloader',
+                'url': 'https://igdownloader.app/',
+                'description': 'Fast Instagram content downloader',
+                'supports': ['All Instagram content']
+            }
+        ],
+        'instructions': 'Visit any service URL and paste your Instagram link to download',
+        'message': 'Multiple working services provided for reliability'
+    },
+    'tiktok': {
+        'name': 'TikTok',
+        'download_services': [
+            {
+                'name': 'SnapTik',
+                'url': 'https://snaptik.app/',
+                'description': 'Download TikTok videos without watermark',
+                'features': ['No watermark', 'HD quality', 'MP4 format']
+            },
+            {
+                'name': 'SSSTikTok',
+                'url': 'https://ssstik.io/',
+                'description': 'Fast TikTok video downloader',
+                'features': ['No watermark', 'Audio download', 'Fast processing']
+            },
+            {
+                'name': 'TikMate',
+                'url': 'https://tikmate.app/',
+                'description': 'Download TikTok videos with audio',
+                'features': ['HD quality', 'No watermark', 'Free']
+            }
+        ],
+        'instructions': 'Visit any service URL and paste your TikTok link',
+        'message': 'All services support downloading without watermark'
+    },
+    'facebook': {
+        'name': 'Facebook',
+        'download_services': [
+            {
+                'name': 'FBDown',
+                'url': 'https://fbdown.net/',
+                'description': 'Download Facebook videos in HD',
+                'quality_options': ['SD', 'HD', 'Full HD']
+            },
+            {
+                'name': 'GetFBStuff',
+                'url': 'https://getfbstuff.com/',
+                'description': 'Facebook video downloader',
+                'quality_options': ['Multiple qualities available']
+            },
+            {
+                'name': 'SaveFrom.net',
+                'url': 'https://en.savefrom.net/7/',
+                'description': 'Download from Facebook and other platforms',
+                'quality_options': ['Best available quality']
+            }
+        ],
+        'instructions': 'Paste your Facebook video URL on any service',
+        'message': 'Choose service based on desired quality'
+    },
+    'twitter': {
+        'name': 'Twitter',
+        'download_services': [
+            {
+                'name': 'Twitter Video Downloader',
+                'url': 'https://twittervideodownloader.com/',
+                'description': 'Download Twitter videos and GIFs',
+                'supports': ['Videos', 'GIFs', 'Images']
+            },
+            {
+                'name': 'SaveTweetVid',
+                'url': 'https://www.savetweetvid.com/',
+                'description': 'Fast Twitter video downloader',
+                'supports': ['Videos', 'GIFs']
+            }
+        ],
+        'instructions': 'Paste tweet URL to download media',
+        'message': 'Supports all Twitter media types'
+    }
+}
+
+# Only Instagram ever rejected URLs; the other downloaders accept any link and
+# just leave media_id and media_kind null when they cannot identify it
+STRICT_URL_PLATFORMS = frozenset(('instagram',))
+
+def social_download(platform):
+    url = request.args.get('url', '').strip()
     
     if not url:
         return jsonify({'error': 'URL parameter required', 'status': 400}), 400
     
-    # Extract Instagram post ID
-    post_match = re.search(r'instagram\.com/(?:p|reel)/([A-Za-z0-9_-]+)', url)
+    ref = classify_url(url)
+    info = SOCIAL_PLATFORMS[platform]
     
-    if not post_match:
-        return jsonify({'error': 'Invalid Instagram URL', 'status': 400}), 400
+    if ref is not None and ref.platform != platform:
+        ref = None
+    if ref is None and platform in STRICT_URL_PLATFORMS:
+        return jsonify({'error': f"Invalid {info['name']} URL", 'status': 400}), 400
     
-    post_id = post_match.group(1)
-    
-    # Provide working download services
-    services = [
-        {
-            'name': 'SnapInsta',
-            'url': f'https://snapinsta.app/',
-            'description': 'Paste Instagram URL to download',
-            'supports': ['Photos', 'Videos', 'Reels', 'IGTV']
-        },
-        {
-            'name': 'Inflact',
-            'url': f'https://inflact.com/downloader/instagram/photo/',
-            'description': 'Instagram photo and video downloader',
-            'supports': ['Photos', 'Videos', 'Stories']
-        },
-        {
-            'name': 'IG Downloader',
-            'url': f'https://igdownloader.app/',
-            'description': 'Fast Instagram content downloader',
-            'supports': ['All Instagram content']
+    def build():
+        result = {
+            'success': True,
+            'media_id': ref.id if ref else None,
+            'media_kind': ref.kind if ref else None,
+            'original_url': url,
+            'download_services': info['download_services'],
+            'instructions': info['instructions'],
+            'message': info['message']
         }
-    ]
+        if platform == 'instagram':
+            result['post_id'] = ref.id  # field name from before media_id existed
+        return result
     
-    return jsonify({
-        'success': True,
-        'post_id': post_id,
-        'original_url': url,
-        'download_services': services,
-        'instructions': 'Visit any service URL and paste your Instagram link to download',
-        'message': 'Multiple working services provided for reliability'
-    })
+    # The body echoes original_url, so the key needs the URL itself, not just the media ID
+    return cached_response(response_key(f'{platform}-download', url), build)
+
+@app.route('/api/instagram/download', methods=['GET'])
+@require_api_key
+@tier_limit('social')
+def instagram_download():
+    return social_download('instagram')
 
 @app.route('/api/tiktok/download', methods=['GET'])
 @require_api_key
-@limiter.limit("10 per minute")
+@tier_limit('social')
 def tiktok_download():
-    url = request.args.get('url', '')
-    
-    if not url:
-        return jsonify({'error': 'URL parameter required', 'status': 400}), 400
-    
-    services = [
-        {
-            'name': 'SnapTik',
-            'url': f'https://snaptik.app/',
-            'description': 'Download TikTok videos without watermark',
-            'features': ['No watermark', 'HD quality', 'MP4 format']
-        },
-        {
-            'name': 'SSSTikTok',
-            'url': f'https://ssstik.io/',
-            'description': 'Fast TikTok video downloader',
-            'features': ['No watermark', 'Audio download', 'Fast processing']
-        },
-        {
-            'name': 'TikMate',
-            'url': f'https://tikmate.app/',
-            'description': 'Download TikTok videos with audio',
-            'features': ['HD quality', 'No watermark', 'Free']
-        }
-    ]
-    
-    return jsonify({
-        'success': True,
-        'original_url': url,
-        'download_services': services,
-        'instructions': 'Visit any service URL and paste your TikTok link',
-        'message': 'All services support downloading without watermark'
-    })
+    return social_download('tiktok')
 
 @app.route('/api/facebook/download', methods=['GET'])
 @require_api_key
-@limiter.limit("10 per minute")
+@tier_limit('social')
 def facebook_download():
-    url = request.args.get('url', '')
-    
-    if not url:
-        return jsonify({'error': 'URL parameter required', 'status': 400}), 400
-    
-    services = [
-        {
-            'name': 'FBDown',
-            'url': f'https://fbdown.net/',
-            'description': 'Download Facebook videos in HD',
-            'quality_options': ['SD', 'HD', 'Full HD']
-        },
-        {
-            'name': 'GetFBStuff',
-            'url': f'https://getfbstuff.com/',
-            'description': 'Facebook video downloader',
-            'quality_options': ['Multiple qualities available']
-        },
-        {
-            'name': 'SaveFrom.net',
-            'url': f'https://en.savefrom.net/7/',
-            'description': 'Download from Facebook and other platforms',
-            'quality_options': ['Best available quality']
-        }
-    ]
-    
-    return jsonify({
-        'success': True,
-        'original_url': url,
-        'download_services': services,
-        'instructions': 'Paste your Facebook video URL on any service',
-        'message': 'Choose service based on desired quality'
-    })
+    return social_download('facebook')
 
 @app.route('/api/twitter/download', methods=['GET'])
 @require_api_key
-@limiter.limit("10 per minute")
+@tier_limit('social')
 def twitter_download():
+    return social_download('twitter')
+
+# ==============================================
+# MEDIA RESOLVER
+# ==============================================
+
+def resolve_media(ref, format_type):
+    """Response body for a classified URL; depends only on the canonical ID and format"""
+    body = {
+        'success': True,
+        'platform': ref.platform,
+        'kind': ref.kind,
+        'media_id': ref.id,
+        'canonical_url': canonical_url(ref)
+    }
+    if ref.platform == 'youtube':
+        body.update({
+            'format': format_type,
+            'thumbnail': f'https://img.youtube.com/vi/{ref.id}/maxresdefault.jpg',
+            'embed_url': f'https://www.youtube.com/embed/{ref.id}',
+            'download_services': youtube_services(ref.id, format_type),
+            'instructions': 'Visit any download_services URL to download the video',
+            'message': 'Use /api/youtube/download for direct stream formats'
+        })
+    else:
+        info = SOCIAL_PLATFORMS[ref.platform]
+        body.update({
+            'download_services': info['download_services'],
+            'instructions': info['instructions'],
+            'message': info['message']
+        })
+    return body
+
+@app.route('/api/media/resolve', methods=['GET'])
+@require_api_key
+@tier_limit('social')
+def media_resolve():
     url = request.args.get('url', '')
     
     if not url:
         return jsonify({'error': 'URL parameter required', 'status': 400}), 400
     
-    services = [
-        {
-            'name': 'Twitter Video Downloader',
-            'url': f'https://twittervideodownloader.com/',
-            'description': 'Download Twitter videos and GIFs',
-            'supports': ['Videos', 'GIFs', 'Images']
-        },
-        {
-            'name': 'SaveTweetVid',
-            'url': f'https://www.savetweetvid.com/',
-            'description': 'Fast Twitter video downloader',
-            'supports': ['Videos', 'GIFs']
-        }
-    ]
+    ref = classify_url(url)
     
-    return jsonify({
-        'success': True,
-        'original_url': url,
-        'download_services': services,
-        'instructions': 'Paste tweet URL to download media',
-        'message': 'Supports all Twitter media types'
-    })
+    if ref is None:
+        return jsonify({
+            'error': 'Unsupported media URL',
+            'supported': sorted(['youtube', *SOCIAL_PLATFORMS]),
+            'status': 400
+        }), 400
+    
+    format_type = None
+    if ref.platform == 'youtube':
+        format_type = request.args.get('format', 'mp4').lower()
+        format_type = format_type if format_type in YOUTUBE_SERVICES else 'mp4'
+    
+    return cached_response(
+        response_key('resolve', ref.platform, ref.kind, ref.id, format_type),
+        lambda: resolve_media(ref, format_type)
+    )
 
 # ==============================================
 # IMAGE APIs
 # ==============================================
 
+probe_cache = make_cache('image_probe', app.config['PROBE_CACHE_SIZE'], app.config['PROBE_CACHE_TTL'])
+
+def image_mimetype(content_type):
+    """Lower-cased mimetype of a Content-Type value if it is an image type, else None"""
+    mimetype = content_type.split(';', 1)[0].strip().lower()
+    return mimetype if mimetype.startswith('image/') else None
+
+def probe_image(url):
+    started = time.perf_counter()
+    probe = probe_cache.get(url)
+    cached = probe is not None
+    
+    if not cached:
+        response = outbound_head(url, read_timeout=5)
+        content_type = response.headers.get('content-type', '')
+        probe = {
+            'valid': image_mimetype(content_type) is not None,
+            'content_type': content_type,
+            'size': response.headers.get('content-length', 'unknown')
+        }
+        if response.status_code < 500:
+            probe_cache.set(url, probe)
+    
+    return {**probe, 'cached': cached, 'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)}
+
+def _bulk_probe(url):
+    started = time.perf_counter()
+    try:
+        return {'url': url, **probe_image(url)}
+    except Exception as e:
+        return {
+            'url': url,
+            'valid': False,
+            'error': str(e),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+class MediaDiskCache:
+    """
+    Upstream media bodies on local disk, evicted least-recently-used by total size.
+    
+    Each store writes a new body file and then atomically replaces the entry's
+    .json, which names that body, so a reader never pairs one body with another
+    version's metadata. Other workers may evict or replace files at any time;
+    readers treat a vanished body as a miss.
+    """
+
+    def __init__(self, directory, max_bytes, max_file_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self._total = None  # approximate bytes on disk; None until the first scan
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest())
+
+    def _read_meta(self, path):
+        try:
+            with open(path + '.json') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def lookup(self, url):
+        """Return (body path, metadata) for a cached URL, or None"""
+        meta = self._read_meta(self._path(url))
+        if not meta or 'body' not in meta:
+            return None
+        body = os.path.join(self.directory, meta['body'])
+        try:
+            os.utime(body)  # mtime doubles as the LRU timestamp
+        except OSError:
+            return None
+        return body, meta
+
+    def store(self, url, meta, chunks):
+        """
+        Write chunks through to the cache while yielding them. The body is
+        committed only if the stream ends cleanly, at meta['size'] bytes when
+        that is known, and within max_file_bytes; meta['size'] is then the
+        byte count actually written.
+        """
+        path = self._path(url)
+        body = f'{path}.{os.urandom(8).hex()}'
+        tmp_path = body + '.tmp'
+        written = 0
+        committed = False
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in chunks:
+                    written += len(chunk)
+                    if written <= self.max_file_bytes:
+                        f.write(chunk)
+                    yield chunk
+            if written <= self.max_file_bytes and meta['size'] in (None, written):
+                previous = self._read_meta(path)
+                os.replace(tmp_path, body)
+                with open(tmp_path, 'w') as f:
+                    json.dump({**meta, 'size': written, 'body': os.path.basename(body)}, f)
+                os.replace(tmp_path, path + '.json')
+                committed = True
+                if previous and previous.get('body'):
+                    self._remove(os.path.join(self.directory, previous['body']))
+        finally:
+            if not committed:
+                self._remove(tmp_path)
+        if committed:
+            self._account(written)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _account(self, size):
+        """Add a stored body to the running total and only rescan once it passes max_bytes"""
+        with self._lock:
+            if self._total is not None:
+                self._total += size
+                if self._total <= self.max_bytes:
+                    return
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        try:
+            scan = list(os.scandir(self.directory))
+        except OSError:
+            return
+        for entry in scan:
+            if entry.name.endswith(('.json', '.tmp')):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # removed by another worker since the scan
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            name = os.path.basename(path)
+            key = os.path.join(self.directory, name.split('.')[0])
+            meta = self._read_meta(key)
+            if meta and meta.get('body') == name:
+                self._remove(key + '.json')
+            total -= size
+        with self._lock:
+            self._total = total
+
+media_cache = MediaDiskCache(
+    app.config['MEDIA_CACHE_DIR'],
+    app.config['MEDIA_CACHE_MAX_BYTES'],
+    app.config['MEDIA_CACHE_MAX_FILE']
+)
+
+PROXY_REQUEST_HEADERS = ('Range', 'If-None-Match', 'If-Modified-Since', 'If-Range')
+PROXY_RESPONSE_HEADERS = ('Content-Length', 'Content-Range', 'Accept-Ranges', 'ETag', 'Last-Modified')
+# Proxied bodies are served from the API's own origin; never let a browser run them as a document.
+# Cache-Control is private: the responses sit behind an API key and carry per-key X-RateLimit-* headers.
+PROXY_SECURITY_HEADERS = {'X-Content-Type-Options': 'nosniff', 'Content-Security-Policy': 'sandbox'}
+
+def cached_image(path, meta):
+    """send_file response for a disk cache hit, or None if the body vanished since the lookup"""
+    etag, weak = unquote_etag(meta['etag']) if meta.get('etag') else (None, False)
+    try:
+        # send_file answers Range and If-None-Match itself and uses sendfile() for full bodies
+        response = send_file(
+            path,
+            mimetype=meta['content_type'],
+            conditional=True,
+            etag=False if weak else etag or True,
+            max_age=app.config['MEDIA_CACHE_MAX_AGE']
+        )
+    except FileNotFoundError:
+        return None
+    if weak:
+        # send_file only sets strong validators; keep the origin's weak one as it was
+        response.set_etag(etag, weak=True)
+        if response.status_code == 200:
+            response.make_conditional(request)
+    response.headers.update(PROXY_SECURITY_HEADERS)
+    response.headers['Cache-Control'] = f"private, max-age={app.config['MEDIA_CACHE_MAX_AGE']}"
+    response.headers['X-Cache'] = 'HIT'
+    return response
+
+def proxy_image(image_url):
+    """Serve the image bytes themselves, from the disk cache or streamed from the origin"""
+    hit = media_cache.lookup(image_url)
+    if hit is not None and image_mimetype(hit[1].get('content_type', '')):
+        response = cached_image(*hit)
+        if response is not None:
+            return response
+    
+    forward = {name: request.headers[name] for name in PROXY_REQUEST_HEADERS if name in request.headers}
+    upstream = outbound_get(image_url, stream=True, headers=forward)
+    
+    if upstream.status_code not in (200, 206, 304):
+        upstream.close()
+        return jsonify({'error': 'Failed to fetch image', 'status': 502, 'upstream_status': upstream.status_code}), 502
+    
+    content_type = image_mimetype(upstream.headers.get('content-type', ''))
+    if upstream.status_code != 304 and content_type is None:
+        upstream.close()
+        return jsonify({'error': 'URL does not point to an image', 'status': 400}), 400
+    
+    headers = {name: upstream.headers[name] for name in PROXY_RESPONSE_HEADERS if name in upstream.headers}
+    if content_type:
+        headers['Content-Type'] = content_type
+    headers.update(PROXY_SECURITY_HEADERS)
+    headers['Cache-Control'] = f"private, max-age={app.config['MEDIA_CACHE_MAX_AGE']}"
+    headers['X-Cache'] = 'MISS'
+    
+    def body():
+        try:
+            yield from upstream.iter_content(chunk_size=app.config['MEDIA_PROXY_CHUNK_SIZE'])
+        finally:
+            upstream.close()
+    
+    chunks = body()
+    size = content_length(upstream.headers)
+    if upstream.headers.get('content-encoding', 'identity').lower() != 'identity':
+        # iter_content decodes gzip/deflate, so the origin's length no longer matches the body
+        headers.pop('Content-Length', None)
+        size = None
+    if upstream.status_code == 200 and not forward and (size is None or size <= media_cache.max_file_bytes):
+        meta = {'content_type': content_type, 'size': size, 'etag': upstream.headers.get('etag')}
+        chunks = media_cache.store(image_url, meta, chunks)
+    
+    return Response(chunks, status=upstream.status_code, headers=headers, direct_passthrough=True)
+
 @app.route('/api/image/download', methods=['GET'])
 @require_api_key
-@limiter.limit("30 per minute")
+@tier_limit('image')
 def download_image():
     image_url = request.args.get('url', '')
     
@@ -762,17 +2366,19 @@ def download_image():
         return jsonify({'error': 'URL parameter required', 'status': 400}), 400
     
     try:
-        response = requests.head(image_url, timeout=5)
-        content_type = response.headers.get('content-type', '')
+        if request.args.get('proxy') == '1':
+            return proxy_image(image_url)
         
-        if 'image' not in content_type:
+        probe = probe_image(image_url)
+        
+        if not probe['valid']:
             return jsonify({'error': 'URL does not point to an image', 'status': 400}), 400
         
         return jsonify({
             'success': True,
             'image_url': image_url,
-            'content_type': content_type,
-            'size': response.headers.get('content-length', 'unknown'),
+            'content_type': probe['content_type'],
+            'size': probe['size'],
             'download_link': image_url,
             'message': 'Use download_link to retrieve the image'
         })
@@ -781,7 +2387,7 @@ def download_image():
 
 @app.route('/api/image/bulk-download', methods=['POST'])
 @require_api_key
-@limiter.limit("10 per minute")
+@tier_limit('image')
 def bulk_download_images():
     data = request.get_json()
     
@@ -793,37 +2399,26 @@ def bulk_download_images():
     if not isinstance(urls, list):
         return jsonify({'error': 'urls must be an array', 'status': 400}), 400
     
-    if len(urls) > 20:
-        return jsonify({'error': 'Maximum 20 URLs allowed', 'status': 400}), 400
+    max_urls = app.config['BULK_MAX_URLS']
+    if len(urls) > max_urls:
+        return jsonify({'error': f'Maximum {max_urls} URLs allowed', 'status': 400}), 400
     
-    results = []
-    for url in urls:
-        try:
-            response = requests.head(url, timeout=5)
-            content_type = response.headers.get('content-type', '')
-            
-            results.append({
-                'url': url,
-                'valid': 'image' in content_type,
-                'content_type': content_type,
-                'size': response.headers.get('content-length', 'unknown')
-            })
-        except Exception as e:
-            results.append({
-                'url': url,
-                'valid': False,
-                'error': str(e)
-            })
+    started = time.perf_counter()
+    results = [
+        result or {'url': url, 'valid': False, 'error': error, 'elapsed_ms': None}
+        for url, result, error in fan_out(_bulk_probe, urls, app.config['BULK_DEADLINE'])
+    ]
     
     return jsonify({
         'success': True,
         'total': len(urls),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
         'results': results
     })
 
 @app.route('/api/image/search', methods=['GET'])
 @require_api_key
-@limiter.limit("20 per minute")
+@tier_limit('image')
 def search_images():
     query = request.args.get('query', '')
     count = int(request.args.get('count', 10))
@@ -858,9 +2453,50 @@ def search_images():
         'message': 'Visit source URLs or integrate their APIs for image search'
     })
 
+base64_cache = make_cache('base64', app.config['BASE64_CACHE_SIZE'], app.config['BASE64_CACHE_TTL'])
+
+class PayloadTooLarge(Exception):
+    pass
+
+class Base64Stream:
+    """Encode a streamed upstream body to base64 chunk by chunk, enforcing a byte cap"""
+
+    def __init__(self, response, max_bytes):
+        self.response = response
+        self.max_bytes = max_bytes
+        self.size = 0
+
+    def __iter__(self):
+        carry = b''
+        try:
+            for chunk in self.response.iter_content(chunk_size=app.config['BASE64_CHUNK_SIZE']):
+                self.size += len(chunk)
+                if self.size > self.max_bytes:
+                    raise PayloadTooLarge(f'Image exceeds {self.max_bytes} bytes')
+                if carry:
+                    chunk = carry + chunk
+                cut = len(chunk) - len(chunk) % 3
+                carry = chunk[cut:]
+                yield base64.b64encode(chunk[:cut]).decode('ascii')
+            yield base64.b64encode(carry).decode('ascii')
+        finally:
+            self.response.close()
+
+def _stream_base64_body(encoder, content_type, parts=None):
+    # 'success' goes last so a payload that overflows mid-stream still ends as valid JSON
+    yield '{"content_type": %s, "cached": false, "base64": "data:%s;base64,' % (
+        json.dumps(content_type), json.dumps(content_type)[1:-1])
+    try:
+        for part in encoder if parts is None else parts:
+            yield part
+    except (PayloadTooLarge, requests.RequestException) as e:
+        yield '", "size": %d, "success": false, "error": %s}' % (encoder.size, json.dumps(str(e)))
+        return
+    yield '", "size": %d, "success": true}' % encoder.size
+
 @app.route('/api/image/to-base64', methods=['POST'])
 @require_api_key
-@limiter.limit("20 per minute")
+@tier_limit('image')
 def image_to_base64():
     data = request.get_json()
     
@@ -868,22 +2504,56 @@ def image_to_base64():
         return jsonify({'error': 'JSON body with "url" required', 'status': 400}), 400
     
     image_url = data['url']
+    stream = bool(data.get('stream')) or request.args.get('stream') == '1'
+    max_bytes = app.config['BASE64_MAX_BYTES']
+    
+    cached = base64_cache.get(image_url)
+    if cached is not None:
+        return jsonify({'success': True, **cached, 'cached': True})
     
     try:
-        response = requests.get(image_url, timeout=10)
+        response = outbound_get(image_url, stream=True)
         
         if response.status_code != 200:
+            response.close()
             return jsonify({'error': 'Failed to fetch image', 'status': 400}), 400
         
-        base64_string = base64.b64encode(response.content).decode('utf-8')
+        length = content_length(response.headers)
+        if length is not None and length > max_bytes:
+            response.close()
+            return jsonify({'error': f'Image exceeds {max_bytes} bytes', 'status': 413}), 413
+        
         content_type = response.headers.get('content-type', 'image/jpeg')
+        encoder = Base64Stream(response, max_bytes)
+        cache_max = app.config['BASE64_CACHE_MAX_BYTES']
         
-        return jsonify({
-            'success': True,
-            'base64': f'data:{content_type};base64,{base64_string}',
-            'size': len(response.content),
+        def streamed(parts=None):
+            body = Response(_stream_base64_body(encoder, content_type, parts), mimetype='application/json')
+            # Closes the upstream even if the client leaves before the body is iterated
+            body.call_on_close(response.close)
+            return body
+        
+        if stream or (length is not None and length > cache_max):
+            return streamed()
+        
+        # Buffer only what could be cached; past that, carry on in the streamed format
+        parts = iter(encoder)
+        buffered = []
+        for part in parts:
+            buffered.append(part)
+            if encoder.size > cache_max:
+                return streamed(itertools.chain(buffered, parts))
+        
+        result = {
+            'base64': f"data:{content_type};base64,{''.join(buffered)}",
+            'size': encoder.size,
             'content_type': content_type
-        })
+        }
+        base64_cache.set(image_url, result)
+        
+        return jsonify({'success': True, **result, 'cached': False})
+    except PayloadTooLarge as e:
+        return jsonify({'error': str(e), 'status': 413}), 413
     except Exception as e:
         return jsonify({'error': str(e), 'status': 500}), 500
 
@@ -909,7 +2579,7 @@ SHONA_RESPONSES = {
 
 @app.route('/api/ai/text-generate', methods=['GET', 'POST'])
 @require_api_key
-@limiter.limit("30 per minute")
+@tier_limit('ai')
 def ai_text_generate():
     if request.method == 'POST':
         data = request.get_json()
@@ -944,7 +2614,7 @@ def ai_text_generate():
 
 @app.route('/api/ai/shona-ai', methods=['GET', 'POST'])
 @require_api_key
-@limiter.limit("30 per minute")
+@tier_limit('ai')
 def shona_ai():
     """Shona Language AI - Responds in Shona"""
     if request.method == 'POST':
@@ -982,7 +2652,7 @@ def shona_ai():
 
 @app.route('/api/ai/ntando-mods', methods=['GET', 'POST'])
 @require_api_key
-@limiter.limit("30 per minute")
+@tier_limit('ai')
 def ntando_mods_ai():
     """Ntando Mods AI - Advanced conversational AI"""
     if request.method == 'POST':
@@ -1016,9 +2686,27 @@ def ntando_mods_ai():
         'timestamp': datetime.now().isoformat()
     })
 
+CODE_TEMPLATES = {
+    'python': {
+        'hello world': 'print("Hello, World!")',
+        'sort': 'my_list = [3, 1, 4, 1, 5]\nmy_list.sort()\nprint(my_list)',
+        'loop': 'for i in range(10):\n    print(i)'
+    },
+    'javascript': {
+        'hello world': 'console.log("Hello, World!");',
+        'sort': 'let arr = [3, 1, 4, 1, 5];\narr.sort((a, b) => a - b);\nconsole.log(arr);',
+        'loop': 'for (let i = 0; i < 10; i++) {\n    console.log(i);\n}'
+    },
+    'java': {
+        'hello world': 'public class Main {\n    public static void main(String[] args) {\n        System.out.println("Hello, World!");\n    }\n}',
+        'sort': 'import java.util.Arrays;\n\nint[] arr = {3, 1, 4, 1, 5};\nArrays.sort(arr);',
+        'loop': 'for (int i = 0; i < 10; i++) {\n    System.out.println(i);\n}'
+    }
+}
+
 @app.route('/api/ai/code-generate', methods=['GET', 'POST'])
 @require_api_key
-@limiter.limit("20 per minute")
+@tier_limit('ai')
 def ai_code_generate():
     if request.method == 'POST':
         data = request.get_json()
@@ -1028,28 +2716,11 @@ def ai_code_generate():
         language = request.args.get('language', 'python')
         task = request.args.get('task', 'hello world')
     
-    # Code templates
-    code_templates = {
-        'python': {
-            'hello world': 'print("Hello, World!")',
-            'sort': 'my_list = [3, 1, 4, 1, 5]\nmy_list.sort()\nprint(my_list)',
-            'loop': 'for i in range(10):\n    print(i)'
-        },
-        'javascript': {
-            'hello world': 'console.log("Hello, World!");',
-            'sort': 'let arr = [3, 1, 4, 1, 5];\narr.sort((a, b) => a - b);\nconsole.log(arr);',
-            'loop': 'for (let i = 0; i < 10; i++) {\n    console.log(i);\n}'
-        },
-        'java': {
-            'hello world': 'public class Main {\n    public static void main(String[] args) {\n        System.out.println("Hello, World!");\n    }\n}',
-            'sort': 'import java.util.Arrays;\n\nint[] arr = {3, 1, 4, 1, 5};\nArrays.sort(arr);',
-            'loop': 'for (int i = 0; i < 10; i++) {\n    System.out.println(i);\n}'
-        }
-    }
-    
-    code = code_templates.get(language.lower(), code_templates['python']).get(task.lower(), 'print("Task not found")')
+    # The body echoes language and task as sent, so they key the cache as sent; only the lookup is normalized
+    templates = CODE_TEMPLATES.get(' '.join(language.casefold().split()), CODE_TEMPLATES['python'])
+    code = templates.get(' '.join(task.casefold().split()), 'print("Task not found")')
     
-    return jsonify({
+    return cached_response(response_key('code', language, task), lambda: {
         'success': True,
         'language': language,
         'task': task,
@@ -1059,7 +2730,7 @@ def ai_code_generate():
 
 @app.route('/api/ai/name-generator', methods=['GET'])
 @require_api_key
-@limiter.limit("30 per minute")
+@tier_limit('ai')
 def name_generator():
     name_type = request.args.get('type', 'business')
     count = int(request.args.get('count', 5))
@@ -1081,7 +2752,7 @@ def name_generator():
 
 @app.route('/api/ai/content-writer', methods=['POST'])
 @require_api_key
-@limiter.limit("10 per minute")
+@tier_limit('ai')
 def content_writer():
     data = request.get_json()
     
@@ -1126,84 +2797,545 @@ In summary, {topic} offers many opportunities for growth and learning.
 # UTILITIES
 # ==============================================
 
+# WMO weather interpretation codes, as reported by Open-Meteo
+WMO_CONDITIONS = {
+    0: 'Clear', 1: 'Mainly Clear', 2: 'Partly Cloudy', 3: 'Overcast',
+    45: 'Fog', 48: 'Fog',
+    51: 'Drizzle', 53: 'Drizzle', 55: 'Drizzle', 56: 'Freezing Drizzle', 57: 'Freezing Drizzle',
+    61: 'Rain', 63: 'Rain', 65: 'Heavy Rain', 66: 'Freezing Rain', 67: 'Freezing Rain',
+    71: 'Snow', 73: 'Snow', 75: 'Heavy Snow', 77: 'Snow Grains',
+    80: 'Rain Showers', 81: 'Rain Showers', 82: 'Heavy Rain Showers', 85: 'Snow Showers', 86: 'Snow Showers',
+    95: 'Thunderstorm', 96: 'Thunderstorm With Hail', 99: 'Thunderstorm With Hail'
+}
+
+WEATHER_UNITS = {'temperature': '°C', 'humidity': '%', 'wind_speed': 'km/h'}
+
+def normalize_city(city):
+    """Cache key for a city name, ignoring case, accents and spacing: ' São  Paulo, BR' -> 'sao paulo,br'"""
+    text = ''.join(c for c in unicodedata.normalize('NFKD', city) if not unicodedata.combining(c))
+    return ','.join(' '.join(part.split()) for part in text.casefold().split(','))
+
+def weather_key(latitude, longitude):
+    # Two decimal places is about 1 km, well inside one forecast grid cell
+    return f'{latitude:.2f},{longitude:.2f}'
+
+class FixtureWeatherProvider:
+    """
+    Cities and observations from a JSON file:
+    {"update_interval": 900, "cities": {"Harare": {"country": ..., "latitude": ..., "longitude": ...,
+    "current": {"temperature": ..., "condition": ..., "humidity": ..., "wind_speed": ...}}}}
+    """
+    name = 'fixture'
+
+    def __init__(self, path):
+        with open(path) as f:
+            data = json.load(f)
+        self.update_interval = data.get('update_interval', 900)
+        self.cities = {normalize_city(name): {**entry, 'city': name} for name, entry in data['cities'].items()}
+        self.observations = {
+            weather_key(entry['latitude'], entry['longitude']): entry['current'] for entry in self.cities.values()
+        }
+
+    def locate(self, city_key):
+        entry = self.cities.get(city_key) or self.cities.get(city_key.partition(',')[0])
+        if entry is None:
+            return None
+        return {key: entry.get(key) for key in ('city', 'country', 'latitude', 'longitude')}
+
+    def current(self, latitude, longitude):
+        observation = self.observations.get(weather_key(latitude, longitude))
+        if observation is None:
+            raise LookupError('No fixture weather for these coordinates')
+        return {**observation, 'timestamp': datetime.now(timezone.utc).isoformat()}, self.update_interval
+
+class OpenMeteoWeatherProvider:
+    name = 'open-meteo'
+
+    def __init__(self, forecast_url, geocoding_url):
+        self.forecast_url = forecast_url
+        self.geocoding_url = geocoding_url
+
+    def locate(self, city_key):
+        # 'harare,zw' narrows the search to one country
+        name, _, country = city_key.partition(',')
+        params = {'name': name, 'count': 1, 'format': 'json'}
+        if len(country) == 2:
+            params['countryCode'] = country.upper()
+        response = outbound_get(self.geocoding_url, params=params)
+        response.raise_for_status()
+        results = response.json().get('results')
+        if not results:
+            return None
+        place = results[0]
+        return {
+            'city': place['name'],
+            'country': place.get('country'),
+            'latitude': place['latitude'],
+            'longitude': place['longitude']
+        }
+
+    def current(self, latitude, longitude):
+        response = outbound_get(self.forecast_url, params={
+            'latitude': latitude,
+            'longitude': longitude,
+            'current': 'temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m',
+            'timezone': 'GMT'
+        })
+        response.raise_for_status()
+        current = response.json()['current']
+        observed = datetime.fromisoformat(current['time']).replace(tzinfo=timezone.utc)
+        interval = current.get('interval') or 900
+        # Keep the reading until the provider publishes the next one
+        ttl = observed.timestamp() + interval - time.time()
+        return {
+            'temperature': current['temperature_2m'],
+            'condition': WMO_CONDITIONS.get(current['weather_code'], 'Unknown'),
+            'humidity': current['relative_humidity_2m'],
+            'wind_speed': current['wind_speed_10m'],
+            'timestamp': observed.isoformat()
+        }, min(max(ttl, app.config['WEATHER_MIN_TTL']), interval)
+
+if app.config['WEATHER_FIXTURE']:
+    weather_provider = FixtureWeatherProvider(app.config['WEATHER_FIXTURE'])
+else:
+    weather_provider = OpenMeteoWeatherProvider(app.config['WEATHER_FORECAST_URL'], app.config['WEATHER_GEOCODING_URL'])
+
+geocode_cache = make_cache('geocode', app.config['GEOCODE_CACHE_SIZE'], app.config['GEOCODE_CACHE_TTL'])
+geocode_flight = SingleFlight()
+weather_cache = make_cache('weather', app.config['WEATHER_CACHE_SIZE'], 900)  # TTL is set per reading
+weather_flight = SingleFlight()
+
+def weather_query(item):
+    """Location key for a city name or {"lat": ..., "lon": ...}: (key, None) or (None, error)"""
+    if isinstance(item, dict):
+        try:
+            latitude, longitude = float(item['lat']), float(item['lon'])
+        except (KeyError, TypeError, ValueError):
+            return None, 'lat and lon must be numbers'
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return None, 'lat or lon out of range'
+        return '@' + weather_key(latitude, longitude), None
+    if not isinstance(item, str) or not item.strip() or len(item) > 100:
+        return None, 'City must be a non-empty name of at most 100 characters'
+    return normalize_city(item).lstrip('@'), None  # '@' marks coordinate keys
+
+def coordinates_location(key):
+    latitude, longitude = map(float, key[1:].split(','))
+    return {'city': None, 'country': None, 'latitude': latitude, 'longitude': longitude}
+
+def fetch_location(key):
+    location = weather_provider.locate(key)
+    geocode_cache.set(key, location, ttl=None if location else app.config['GEOCODE_NEGATIVE_TTL'])
+    return location
+
+def fetch_observation(wkey, location):
+    observation, ttl = weather_provider.current(location['latitude'], location['longitude'])
+    weather_cache.set(wkey, observation, ttl=ttl)
+    return observation
+
+def cached_weather(key):
+    """Weather from the caches alone: fields, None for an unknown city, or _MISSING if a fetch is needed"""
+    location = coordinates_location(key) if key.startswith('@') else geocode_cache.get(key, _MISSING)
+    if location is None or location is _MISSING:
+        return location
+    observation = weather_cache.get(weather_key(location['latitude'], location['longitude']))
+    return _MISSING if observation is None else {**location, **observation}
+
+def load_weather(key):
+    """Weather after a cache miss, or None for an unknown city; concurrent misses share each fetch"""
+    location = coordinates_location(key) if key.startswith('@') else geocode_cache.get(key, _MISSING)
+    if location is _MISSING:
+        location = geocode_flight.do(key, lambda: fetch_location(key))
+    if location is None:
+        return None
+    
+    # Keyed by coordinates, so every name for the same place shares one reading
+    wkey = weather_key(location['latitude'], location['longitude'])
+    observation = weather_cache.get(wkey)
+    if observation is None:
+        observation = weather_flight.do(wkey, lambda: fetch_observation(wkey, location))
+    return {**location, **observation}
+
 @app.route('/api/weather', methods=['GET'])
 @require_api_key
-@limiter.limit("50 per hour")
+@tier_limit('utilities')
 def weather():
-    city = request.args.get('city', 'Harare')
-    
-    # Mock weather data
-    weather_data = {
-        'city': city,
-        'temperature': random.randint(15, 30),
-        'condition': random.choice(['Sunny', 'Cloudy', 'Rainy', 'Partly Cloudy']),
-        'humidity': random.randint(40, 80),
-        'wind_speed': random.randint(5, 25),
-        'timestamp': datetime.now().isoformat()
-    }
+    if 'lat' in request.args or 'lon' in request.args:
+        key, error = weather_query({'lat': request.args.get('lat'), 'lon': request.args.get('lon')})
+    else:
+        key, error = weather_query(request.args.get('city', 'Harare'))
+    
+    if error:
+        return jsonify({'error': error, 'status': 400}), 400
+    
+    data = cached_weather(key)
+    cached = data is not _MISSING
+    if not cached:
+        try:
+            data = load_weather(key)
+        except Exception as e:
+            app.logger.warning('Weather lookup for %r failed: %s', key, e)
+            return jsonify({'error': 'Weather provider unavailable', 'status': 502}), 502
+    
+    if data is None:
+        return jsonify({'error': 'City not found', 'status': 404, 'cached': cached}), 404
     
     return jsonify({
         'success': True,
-        'data': weather_data,
-        'note': 'For real-time weather, use OpenWeatherMap API'
+        'data': data,
+        'units': WEATHER_UNITS,
+        'provider': weather_provider.name,
+        'cached': cached
     })
 
+@app.route('/api/weather/batch', methods=['POST'])
+@require_api_key
+@tier_limit('utilities')
+def weather_batch():
+    data = request.get_json(silent=True)
+    items = data.get('cities') if isinstance(data, dict) else None
+    max_items = app.config['WEATHER_BATCH_MAX']
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'JSON body with a non-empty "cities" list required', 'status': 400}), 400
+    
+    if len(items) > max_items:
+        return jsonify({'error': f'Maximum {max_items} cities per request', 'status': 400}), 400
+    
+    queries = [weather_query(item) for item in items]
+    
+    found, fetched = cached_fan_out(
+        (key for key, _ in queries if key), cached_weather, load_weather, app.config['BULK_DEADLINE']
+    )
+    
+    results = []
+    for item, (key, error) in zip(items, queries):
+        if error:
+            results.append({'input': item, 'success': False, 'error': error, 'status': 400})
+            continue
+        result, cached, error = found[key]
+        if error is not None:
+            results.append({'input': item, 'success': False, 'error': 'Weather provider unavailable', 'status': 502})
+        elif result is None:
+            results.append({'input': item, 'success': False, 'error': 'City not found', 'status': 404, 'cached': cached})
+        else:
+            results.append({'input': item, 'success': True, 'data': result, 'cached': cached})
+    
+    return jsonify({
+        'success': True,
+        'total': len(items),
+        'unique': len(found),
+        'fetched': fetched,
+        'results': results,
+        'units': WEATHER_UNITS,
+        'provider': weather_provider.name
+    })
+
+DEFAULT_RATES = {'USD': '1.0', 'ZWL': '320.0', 'ZAR': '18.5', 'EUR': '0.85', 'GBP': '0.73'}  # per USD
+
+def parse_rate_json(text, base):
+    """Rates from {"base": "USD", "rates": {"EUR": 0.85, ...}}; base_code is accepted for base"""
+    data = json.loads(text, parse_float=Decimal, parse_int=Decimal)
+    return data.get('base') or data.get('base_code') or base, data['rates']
+
+def parse_rate_csv(text, base):
+    """Rates from currency,rate rows, with an optional header row"""
+    rates = {}
+    for index, row in enumerate(csv.reader(io.StringIO(text))):
+        if not row:
+            continue
+        try:
+            rates[row[0].strip()] = Decimal(row[1].strip())
+        except (IndexError, InvalidOperation):
+            if index == 0:
+                continue
+            raise ValueError(f'Bad rate on CSV line {index + 1}')
+    return base, rates
+
+class StaticRateSource:
+    name = 'built-in'
+
+    def __init__(self, rates, base):
+        self.rates = rates
+        self.base = base
+
+    def load(self):
+        return self.base, self.rates
+
+class FileRateSource:
+    """Rates from a local .json or .csv file, re-read on every refresh"""
+
+    def __init__(self, path, base):
+        self.path = path
+        self.base = base
+        self.name = f'file:{os.path.basename(path)}'
+
+    def load(self):
+        with open(self.path) as f:
+            text = f.read()
+        parser = parse_rate_csv if self.path.endswith('.csv') else parse_rate_json
+        return parser(text, self.base)
+
+class HTTPRateSource:
+    """Rates from an upstream feed serving the JSON or CSV format"""
+
+    def __init__(self, url, base):
+        self.url = url
+        self.base = base
+        self.name = f'feed:{urlsplit(url).hostname}'
+
+    def load(self):
+        response = outbound_get(self.url)
+        response.raise_for_status()
+        parser = parse_rate_csv if 'csv' in response.headers.get('Content-Type', '') else parse_rate_json
+        return parser(response.text, self.base)
+
+def make_rate_source(spec, base):
+    if not spec:
+        return StaticRateSource(DEFAULT_RATES, 'USD')
+    if spec.startswith(('http://', 'https://')):
+        return HTTPRateSource(spec, base)
+    return FileRateSource(spec, base)
+
+RATE_QUANTUM = Decimal('0.000001')
+CENTS = Decimal('0.01')
+MAX_AMOUNT = Decimal('1e12')  # keeps every conversion well inside Decimal's 28 digits
+
+RateSnapshot = namedtuple('RateSnapshot', ['base', 'currencies', 'cross', 'source', 'as_of'])
+
+def build_rate_snapshot(base, rates, source):
+    """Immutable snapshot with the cross rate of every currency pair precomputed"""
+    rates = {code.strip().upper(): Decimal(rate) for code, rate in rates.items()}
+    rates[base.upper()] = Decimal(1)
+    for code, rate in rates.items():
+        if not rate.is_finite() or rate <= 0:
+            raise ValueError(f'Bad rate for {code}: {rate}')
+    # (from, to) -> (exact rate, rate rounded for display as a decimal string)
+    cross = {}
+    for source_code, source_rate in rates.items():
+        for target_code, target_rate in rates.items():
+            rate = target_rate / source_rate
+            cross[(source_code, target_code)] = (rate, format(rate.quantize(RATE_QUANTUM, ROUND_HALF_UP), 'f'))
+    return RateSnapshot(base.upper(), tuple(sorted(rates)), MappingProxyType(cross), source, datetime.now().isoformat())
+
+class CurrencyRates:
+    """
+    Exchange rates refreshed on a background thread. Each refresh builds a new
+    snapshot and swaps it in with a single assignment, so request threads read
+    rates without taking a lock. A failed refresh keeps the previous snapshot.
+    """
+
+    def __init__(self, source, interval, retry_interval):
+        self.source = source
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.last_error = None
+        self._snapshot = None
+        self._refresher = WorkerThread(self._run, 'currency-refresh')
+
+    def refresh(self):
+        base, rates = self.source.load()
+        self._snapshot = build_rate_snapshot(base, rates, self.source.name)
+        self.last_error = None
+
+    def _try_refresh(self):
+        """Refresh once, keeping the old snapshot on failure"""
+        try:
+            self.refresh()
+        except Exception as e:
+            self.last_error = str(e) or type(e).__name__
+            app.logger.warning('Currency rate refresh from %s failed: %s', self.source.name, self.last_error)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval if self.last_error is None else min(self.interval, self.retry_interval))
+            self._try_refresh()
+
+    def start(self):
+        # The first load runs on the caller, so requests never see an empty table after startup
+        if self._snapshot is None:
+            self._try_refresh()
+        self._refresher.ensure()
+
+    def snapshot(self):
+        """Current rates, or None until the first load succeeds"""
+        self._refresher.ensure()
+        return self._snapshot
+
+currency_rates = CurrencyRates(
+    make_rate_source(app.config['CURRENCY_SOURCE'], app.config['CURRENCY_BASE']),
+    app.config['CURRENCY_REFRESH_INTERVAL'],
+    app.config['CURRENCY_RETRY_INTERVAL']
+)
+currency_rates.start()
+
+def parse_amount(value):
+    """Decimal amount, or None if value is not a number within MAX_AMOUNT"""
+    if isinstance(value, bool):
+        return None
+    try:
+        amount = Decimal(str(value).strip())
+    except InvalidOperation:
+        return None
+    return amount if amount.is_finite() and abs(amount) <= MAX_AMOUNT else None
+
+def rates_unavailable():
+    return jsonify({'error': 'Exchange rates are not loaded yet', 'status': 503}), 503
+
 @app.route('/api/currency', methods=['GET'])
 @require_api_key
-@limiter.limit("50 per hour")
+@tier_limit('utilities')
 def currency_converter():
     from_currency = request.args.get('from', 'USD').upper()
     to_currency = request.args.get('to', 'ZWL').upper()
-    amount = float(request.args.get('amount', 1))
-    
-    # Mock exchange rates
-    rates = {
-        'USD': 1.0,
-        'ZWL': 320.0,
-        'ZAR': 18.5,
-        'EUR': 0.85,
-        'GBP': 0.73
-    }
+    amount = parse_amount(request.args.get('amount', 1))
+    snapshot = currency_rates.snapshot()
     
-    if from_currency not in rates or to_currency not in rates:
-        return jsonify({'error': 'Invalid currency code', 'status': 400}), 400
+    if snapshot is None:
+        return rates_unavailable()
     
-    # Convert to USD first, then to target currency
-    usd_amount = amount / rates[from_currency]
-    converted_amount = usd_amount * rates[to_currency]
+    pair = snapshot.cross.get((from_currency, to_currency))
+    if pair is None:
+        return jsonify({'error': 'Invalid currency code', 'status': 400, 'currencies': snapshot.currencies}), 400
     
+    if amount is None:
+        return jsonify({'error': 'amount must be a number', 'status': 400}), 400
+    
+    rate, display_rate = pair
     return jsonify({
         'success': True,
         'from': from_currency,
         'to': to_currency,
-        'amount': amount,
-        'converted': round(converted_amount, 2),
-        'rate': round(rates[to_currency] / rates[from_currency], 4),
+        'amount': float(amount),
+        'converted': float((amount * rate).quantize(CENTS, ROUND_HALF_UP)),
+        'rate': float(display_rate),
+        'rates_as_of': snapshot.as_of,
+        'source': snapshot.source,
         'timestamp': datetime.now().isoformat()
     })
 
-@app.route('/api/qrcode', methods=['GET'])
+@app.route('/api/currency/batch', methods=['POST'])
 @require_api_key
-@limiter.limit("50 per hour")
-def qrcode_generator():
-    data = request.args.get('data', '')
+@tier_limit('utilities')
+def currency_converter_batch():
+    data = request.get_json(silent=True)
+    rows = data.get('conversions') if isinstance(data, dict) else None
+    max_rows = app.config['CURRENCY_BATCH_MAX']
     
-    if not data:
-        return jsonify({'error': 'Data parameter required', 'status': 400}), 400
+    if not isinstance(rows, list) or not rows:
+        return jsonify({'error': 'JSON body with a non-empty "conversions" list required', 'status': 400}), 400
+    
+    if len(rows) > max_rows:
+        return jsonify({'error': f'Maximum {max_rows} conversions per request', 'status': 400}), 400
     
-    # Use external QR code service
-    qr_url = f'https://api.qrserver.com/v1/create-qr-code/?size=300x300&data={data}'
+    # One snapshot for the whole batch, so every row sees the same rates
+    snapshot = currency_rates.snapshot()
+    if snapshot is None:
+        return rates_unavailable()
+    
+    cross = snapshot.cross
+    results = []
+    converted = 0
+    for row in rows:
+        if not isinstance(row, dict):
+            results.append({'success': False, 'error': 'Each conversion must be an object'})
+            continue
+        from_currency = str(row.get('from', '')).upper()
+        to_currency = str(row.get('to', '')).upper()
+        pair = cross.get((from_currency, to_currency))
+        amount = parse_amount(row.get('amount', 1))
+        if pair is None:
+            results.append({'from': from_currency, 'to': to_currency, 'success': False, 'error': 'Invalid currency code'})
+        elif amount is None:
+            results.append({'from': from_currency, 'to': to_currency, 'success': False, 'error': 'amount must be a number'})
+        else:
+            results.append({
+                'success': True,
+                'from': from_currency,
+                'to': to_currency,
+                'amount': format(amount, 'f'),
+                'converted': format((amount * pair[0]).quantize(CENTS, ROUND_HALF_UP), 'f'),
+                'rate': pair[1]
+            })
+            converted += 1
     
     return jsonify({
         'success': True,
-        'data': data,
-        'qr_code_url': qr_url,
-        'message': 'Use qr_code_url to display or download the QR code'
+        'count': len(results),
+        'converted': converted,
+        'results': results,
+        'rates_as_of': snapshot.as_of,
+        'source': snapshot.source,
+        'timestamp': datetime.now().isoformat()
     })
 
+QR_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml', 'json': 'application/json'}
+
+qr_matrices = make_cache('qr_matrices', app.config['QR_MATRIX_CACHE_SIZE'], app.config['QR_MATRIX_CACHE_TTL'], backend='memory')
+
+def qr_matrix(data, ecc):
+    """Module matrix for data at an ecc level, encoded once and shared by every size and format"""
+    key = hashlib.sha256(f'{ecc}:{data}'.encode()).hexdigest()
+    matrix = qr_matrices.get(key)
+    if matrix is None:
+        matrix = qr_codes.encode(data, ecc)
+        qr_matrices.set(key, matrix)
+    return matrix
+
+def render_qr(data, size, ecc, fmt):
+    matrix = qr_matrix(data, ecc)
+    if fmt == 'svg':
+        return qr_codes.render_svg(matrix, size)
+    scale = qr_codes.module_scale(matrix, size)
+    png = qr_codes.render_png(matrix, scale)
+    if fmt == 'png':
+        return png
+    return {
+        'success': True,
+        'data': data,
+        'size': (len(matrix) + 2 * qr_codes.BORDER) * scale,  # whole modules only, so up to size
+        'requested_size': size,
+        'ecc': ecc,
+        'qr_code_url': 'data:image/png;base64,' + base64.b64encode(png).decode(),
+        'message': 'qr_code_url is a data URL; use format=png or format=svg for the image itself'
+    }
+
+@app.route('/api/qrcode', methods=['GET'])
+@require_api_key
+@tier_limit('utilities')
+def qrcode_generator():
+    data = request.args.get('data', '')
+    ecc = request.args.get('ecc', 'm').lower()
+    fmt = request.args.get('format', 'png').lower()
+    
+    if not data:
+        return jsonify({'error': 'Data parameter required', 'status': 400}), 400
+    try:
+        size = int(request.args.get('size', app.config['QR_DEFAULT_SIZE']))
+    except ValueError:
+        return jsonify({'error': 'size must be an integer', 'status': 400}), 400
+    if not qr_codes.MIN_SIZE <= size <= app.config['QR_MAX_SIZE']:
+        return jsonify({
+            'error': f"size must be between {qr_codes.MIN_SIZE} and {app.config['QR_MAX_SIZE']}",
+            'status': 400
+        }), 400
+    if ecc not in qr_codes.ECC_LEVELS:
+        return jsonify({'error': f"ecc must be one of: {', '.join(qr_codes.ECC_LEVELS)}", 'status': 400}), 400
+    if fmt not in QR_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(QR_FORMATS)}", 'status': 400}), 400
+    
+    # Content-addressed: identical inputs share one rendered body
+    key = response_key('qrcode', fmt, ecc, size, data)
+    try:
+        return cached_response(key, lambda: render_qr(data, size, ecc, fmt), mimetype=QR_FORMATS[fmt])
+    except qr_codes.SymbolTooLarge as e:
+        return jsonify({'error': f'{e}; raise size or lower ecc', 'min_size': e.min_size, 'status': 400}), 400
+    except ValueError:
+        return jsonify({'error': f'Data too long for a QR code at ecc level {ecc}', 'status': 400}), 400
+
 @app.route('/api/shorten', methods=['POST'])
 @require_api_key
-@limiter.limit("30 per hour")
+@tier_limit('utilities')
 def url_shortener():
     data = request.get_json()
     
@@ -1211,23 +3343,22 @@ def url_shortener():
         return jsonify({'error': 'JSON body with "url" required', 'status': 400}), 400
     
     long_url = data['url']
+    error = validate_long_url(long_url)
+    if error:
+        return jsonify({'error': error, 'status': 400}), 400
     
-    # Generate random short code
-    short_code = ''.join(random.choices(string.ascii_letters + string.digits, k=6))
-    short_url = f'https://ntando.store/{short_code}'
+    long_url = long_url.strip()
+    code = short_urls.shorten(long_url)
     
     return jsonify({
         'success': True,
-        'original_url': long_url,
-        'short_url': short_url,
-        'short_code': short_code,
-        'timestamp': datetime.now().isoformat(),
-        'note': 'This is a demo response. Implement database storage for production.'
+        **short_url_fields(long_url, code),
+        'timestamp': datetime.now().isoformat()
     })
 
 @app.route('/api/quote', methods=['GET'])
 @require_api_key
-@limiter.limit("100 per hour")
+@tier_limit('utilities')
 def random_quote():
     quotes = [
         {"quote": "The only way to do great work is to love what you do.", "author": "Steve Jobs"},
@@ -1246,6 +3377,620 @@ def random_quote():
         'timestamp': datetime.now().isoformat()
     })
 
+# ==============================================
+# URL SHORTENER
+# ==============================================
+
+SHORT_URL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS short_urls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    url_hash TEXT NOT NULL UNIQUE,
+    created TEXT NOT NULL
+);
+"""
+
+BASE62 = string.digits + string.ascii_letters
+BASE62_INDEX = {char: value for value, char in enumerate(BASE62)}
+SHORT_CODE_SPACE = 62 ** 7
+# Codes are row ids multiplied by a constant coprime to 62**7, so consecutive
+# rows get unrelated-looking codes while every id still maps to exactly one code
+SHORT_CODE_MULTIPLIER = 2_176_477_521_739  # about 0.618 * 62**7, odd and not a multiple of 31
+SHORT_CODE_INVERSE = pow(SHORT_CODE_MULTIPLIER, -1, SHORT_CODE_SPACE)
+
+def encode_short_code(row_id):
+    value = row_id * SHORT_CODE_MULTIPLIER % SHORT_CODE_SPACE
+    chars = []
+    for _ in range(7):
+        value, digit = divmod(value, 62)
+        chars.append(BASE62[digit])
+    return ''.join(reversed(chars))
+
+def decode_short_code(code):
+    """Row id for a code, or None if it is not one we could have issued"""
+    if len(code) != 7:
+        return None
+    value = 0
+    for char in code:
+        digit = BASE62_INDEX.get(char)
+        if digit is None:
+            return None
+        value = value * 62 + digit
+    return value * SHORT_CODE_INVERSE % SHORT_CODE_SPACE or None
+
+def validate_long_url(url):
+    """Error message for a URL we will not shorten, or None"""
+    if not isinstance(url, str) or not url.strip():
+        return 'url must be a non-empty string'
+    if len(url) > app.config['SHORT_URL_MAX_LENGTH']:
+        return f"url longer than {app.config['SHORT_URL_MAX_LENGTH']} characters"
+    parts = urlsplit(url.strip())
+    if parts.scheme not in ('http', 'https') or not parts.netloc:
+        return 'url must be an absolute http(s) URL'
+    return None
+
+class ShortURLStore:
+    """
+    Short codes persisted in SQLite next to the API keys. Identical long URLs
+    share one code, and resolved codes are kept in a per-worker LRU.
+    """
+
+    def __init__(self, path):
+        self._db = SQLiteDatabase(path, SHORT_URL_SCHEMA)
+        self._cache = make_cache('short_urls', app.config['SHORT_URL_CACHE_SIZE'], app.config['SHORT_URL_CACHE_TTL'], backend='memory')
+
+    def shorten_many(self, urls):
+        """Codes for already-validated URLs, in order, allocated in one transaction"""
+        conn = self._db.connection()
+        created = datetime.now().isoformat()
+        codes = []
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for url in urls:
+                url_hash = hashlib.sha256(url.encode()).hexdigest()
+                conn.execute(
+                    'INSERT INTO short_urls (url, url_hash, created) VALUES (?, ?, ?) ON CONFLICT (url_hash) DO NOTHING',
+                    (url, url_hash, created)
+                )
+                row_id = conn.execute('SELECT id FROM short_urls WHERE url_hash = ?', (url_hash,)).fetchone()[0]
+                codes.append(encode_short_code(row_id))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        for url, code in zip(urls, codes):
+            self._cache.set(code, url)
+        return codes
+
+    def shorten(self, url):
+        return self.shorten_many([url])[0]
+
+    def resolve(self, code):
+        """Long URL for a code, or None"""
+        url = self._cache.get(code)
+        if url is not None:
+            return url or None
+        
+        row_id = decode_short_code(code)
+        if row_id is None:
+            return None  # not a code we issue; skip the lookup and keep it out of the LRU
+        
+        row = self._db.execute('SELECT url FROM short_urls WHERE id = ?', (row_id,)).fetchone()
+        if row is None:
+            # Codes are never reused, so only the brief negative TTL keeps this from hiding new rows
+            self._cache.set(code, False, ttl=app.config['SHORT_URL_NEGATIVE_TTL'])
+            return None
+        
+        self._cache.set(code, row[0])
+        return row[0]
+
+short_urls = ShortURLStore(app.config['STORE_PATH'])
+
+def short_url_fields(long_url, code):
+    return {
+        'original_url': long_url,
+        'short_url': f"{app.config['SHORT_URL_BASE']}/{code}",
+        'short_code': code
+    }
+
+@app.route('/api/shorten/bulk', methods=['POST'])
+@require_api_key
+@tier_limit('utilities')
+def url_shortener_bulk():
+    data = request.get_json(silent=True)
+    urls = data.get('urls') if isinstance(data, dict) else None
+    max_urls = app.config['SHORTEN_BULK_MAX']
+    
+    if not isinstance(urls, list) or not urls:
+        return jsonify({'error': 'JSON body with a non-empty "urls" list required', 'status': 400}), 400
+    
+    if len(urls) > max_urls:
+        return jsonify({'error': f'Maximum {max_urls} URLs per request', 'status': 400}), 400
+    
+    errors = [validate_long_url(url) for url in urls]
+    valid = [url.strip() for url, error in zip(urls, errors) if error is None]
+    codes = iter(short_urls.shorten_many(valid)) if valid else iter(())
+    
+    results = []
+    for url, error in zip(urls, errors):
+        if error:
+            results.append({'original_url': url, 'success': False, 'error': error})
+        else:
+            results.append({'success': True, **short_url_fields(url.strip(), next(codes))})
+    
+    return jsonify({
+        'success': True,
+        'count': len(results),
+        'shortened': len(valid),
+        'results': results,
+        'timestamp': datetime.now().isoformat()
+    })
+
+CLICK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS short_url_clicks (
+    url_id INTEGER NOT NULL,
+    hour INTEGER NOT NULL,
+    referrer TEXT NOT NULL,
+    clicks INTEGER NOT NULL,
+    PRIMARY KEY (url_id, hour, referrer)
+) WITHOUT ROWID;
+"""
+
+class ClickBuffer:
+    """
+    Write-behind click counts. Redirects only bump an in-memory counter per
+    (short URL, hour, referrer host); a background thread adds the counters to
+    the hourly rollup table every CLICK_FLUSH_INTERVAL seconds, or sooner once
+    CLICK_FLUSH_MAX_KEYS rows are pending. Flushes are additive upserts, so
+    every worker can flush into the same file independently. While flushes
+    keep failing, at most CLICK_BUFFER_MAX_KEYS rows are held; the oldest
+    are dropped past that.
+    """
+
+    def __init__(self, path, interval, max_keys, max_buffered):
+        self._db = SQLiteDatabase(path, CLICK_SCHEMA)
+        self.interval = interval
+        self.max_keys = max_keys
+        self.max_buffered = max_buffered
+        self.dropped = 0
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher = WorkerThread(self._run, 'click-flush')
+
+    def start(self):
+        self._flusher.ensure()
+
+    def record(self, url_id, referrer):
+        key = (url_id, int(time.time()) // 3600 * 3600, referrer)
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+            pending = len(self._counts)
+            if pending > self.max_buffered:
+                self._trim()
+        if pending >= self.max_keys:
+            self._wake.set()
+        self._flusher.ensure()
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        if not counts:
+            return 0
+        
+        conn = None
+        try:
+            conn = self._db.connection()
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(
+                'INSERT INTO short_url_clicks (url_id, hour, referrer, clicks) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (url_id, hour, referrer) DO UPDATE SET clicks = clicks + excluded.clicks',
+                [(*key, clicks) for key, clicks in counts.items()]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            if conn is not None and conn.in_transaction:
+                conn.execute('ROLLBACK')
+            # Put the counts back, ahead of newer ones, so the next flush retries them
+            with self._lock:
+                for key, clicks in self._counts.items():
+                    counts[key] = counts.get(key, 0) + clicks
+                self._counts = counts
+                self._trim()
+            raise
+        return len(counts)
+
+    def _trim(self):
+        # Caller holds the lock; dicts keep insertion order, so the front is oldest
+        excess = len(self._counts) - self.max_buffered
+        if excess > 0:
+            for key in list(itertools.islice(self._counts, excess)):
+                del self._counts[key]
+            self.dropped += excess
+
+    def _run(self):
+        reported = 0
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                app.logger.warning('Click flush failed, will retry: %s', e)
+            if self.dropped != reported:
+                app.logger.warning('Dropped %d buffered click counts while flushes failed', self.dropped - reported)
+                reported = self.dropped
+
+    def stats(self, url_id, since):
+        total = self._db.execute(
+            'SELECT COALESCE(SUM(clicks), 0) FROM short_url_clicks WHERE url_id = ?', (url_id,)
+        ).fetchone()[0]
+        hourly = self._db.execute(
+            'SELECT hour, SUM(clicks) FROM short_url_clicks WHERE url_id = ? AND hour >= ? '
+            'GROUP BY hour ORDER BY hour', (url_id, since)
+        ).fetchall()
+        referrers = self._db.execute(
+            'SELECT referrer, SUM(clicks) AS n FROM short_url_clicks WHERE url_id = ? AND hour >= ? '
+            'GROUP BY referrer ORDER BY n DESC LIMIT 10', (url_id, since)
+        ).fetchall()
+        return total, hourly, referrers
+
+click_buffer = ClickBuffer(
+    app.config['STORE_PATH'],
+    app.config['CLICK_FLUSH_INTERVAL'],
+    app.config['CLICK_FLUSH_MAX_KEYS'],
+    app.config['CLICK_BUFFER_MAX_KEYS']
+)
+click_buffer.start()
+atexit.register(click_buffer.flush)
+
+def referrer_host(referrer):
+    """Referring site for click rollups: the Referer header's host, or '' for direct visits"""
+    if not referrer:
+        return ''
+    return (urlsplit(referrer).hostname or '')[:255]
+
+@app.route('/<code>')
+@limiter.exempt
+def follow_short_url(code):
+    long_url = short_urls.resolve(code)
+    if long_url is None:
+        return jsonify({'error': 'Short URL not found', 'status': 404}), 404
+    click_buffer.record(decode_short_code(code), referrer_host(request.referrer))
+    return redirect(long_url, code=302)
+
+@app.route('/api/shorten/<code>/stats', methods=['GET'])
+@require_api_key
+@tier_limit('utilities')
+def short_url_stats(code):
+    long_url = short_urls.resolve(code)
+    if long_url is None:
+        return jsonify({'error': 'Short URL not found', 'status': 404}), 404
+    
+    try:
+        hours = int(request.args.get('hours', 168))
+    except ValueError:
+        return jsonify({'error': 'hours must be an integer', 'status': 400}), 400
+    hours = max(1, min(hours, app.config['CLICK_STATS_MAX_HOURS']))
+    
+    since = (int(time.time()) // 3600 - hours + 1) * 3600
+    total, hourly, referrers = click_buffer.stats(decode_short_code(code), since)
+    
+    return jsonify({
+        'success': True,
+        **short_url_fields(long_url, code),
+        'total_clicks': total,
+        'window_hours': hours,
+        'window_clicks': sum(clicks for _, clicks in hourly),
+        'hourly': [{'hour': datetime.fromtimestamp(hour).isoformat(), 'clicks': clicks} for hour, clicks in hourly],
+        'top_referrers': [{'referrer': referrer or '(direct)', 'clicks': clicks} for referrer, clicks in referrers],
+        'delay_seconds': app.config['CLICK_FLUSH_INTERVAL'],  # counts land after each worker's next flush
+        'timestamp': datetime.now().isoformat()
+    })
+
+# ==============================================
+# SYSTEM
+# ==============================================
+
+@app.route('/api/keys/revoke', methods=['POST'])
+@require_api_key
+@tier_limit('utilities')
+def revoke_key():
+    api_key = request.headers.get('X-API-Key') or request.args.get('api_key')
+    if api_key in app.config['API_KEYS']:
+        # Seeded keys such as the public demo key are shared; one holder must not disable them for all
+        return jsonify({'error': 'Configured API keys cannot be revoked', 'status': 403}), 403
+    key_store.revoke(api_key)
+    return jsonify({
+        'success': True,
+        'message': 'API key revoked',
+        'propagation_seconds': app.config['KEY_CACHE_TTL']
+    })
+
+@app.route('/api/system/outbound', methods=['GET'])
+@require_api_key
+@tier_limit('utilities')
+def outbound_status():
+    return jsonify({
+        'success': True,
+        'outbound': outbound_stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/system/caches', methods=['GET'])
+@require_api_key
+@tier_limit('utilities')
+def cache_status():
+    return jsonify({
+        'success': True,
+        'caches': {name: cache.stats() for name, cache in CACHES.items()},
+        'timestamp': datetime.now().isoformat()
+    })
+
+class ReadinessProber:
+    """Probe dependencies on a background thread so /ready only reads the last result"""
+
+    def __init__(self, checks, interval):
+        self.checks = checks
+        self.interval = interval
+        self._snapshot = {'ready': False, 'checks': {}, 'checked_at': None}
+        self._prober = WorkerThread(self._run, 'readiness')
+
+    def probe(self):
+        checks = {}
+        for name, check in self.checks.items():
+            started = time.perf_counter()
+            try:
+                ok, detail = check()
+            except Exception as e:
+                ok, detail = False, str(e) or type(e).__name__
+            checks[name] = {'ok': ok, 'detail': detail, 'elapsed_ms': round((time.perf_counter() - started) * 1000, 3)}
+        # Replaced whole, so readers never see a half-written result
+        self._snapshot = {
+            'ready': all(check['ok'] for check in checks.values()),
+            'checks': checks,
+            'checked_at': time.time()
+        }
+
+    def _run(self):
+        while True:
+            self.probe()
+            time.sleep(self.interval)
+
+    def start(self):
+        self._prober.ensure()
+
+    def snapshot(self):
+        self._prober.ensure()
+        snapshot = self._snapshot
+        if snapshot['checked_at'] is None:
+            return {**snapshot, 'reason': 'first probe pending'}
+        age = time.time() - snapshot['checked_at']
+        if age > 3 * self.interval:
+            return {**snapshot, 'ready': False, 'reason': f'last probe {age:.0f}s ago'}
+        return snapshot
+
+def check_key_store():
+    return key_store.ping(), None
+
+def check_limiter_storage():
+    storage = limiter.limiter.storage
+    return storage.check(), type(storage).__name__
+
+def check_caches():
+    results = {name: cache.ping() for name, cache in CACHES.items()}
+    return all(results.values()), results
+
+def check_outbound_pool():
+    usage = outbound_pool_usage()
+    return usage['saturation'] < app.config['READY_POOL_SATURATION'], usage
+
+readiness = ReadinessProber({
+    'key_store': check_key_store,
+    'rate_limiter': check_limiter_storage,
+    'caches': check_caches,
+    'outbound_pool': check_outbound_pool
+}, app.config['READY_PROBE_INTERVAL'])
+readiness.start()
+
+@app.route('/health')
+@limiter.exempt
+def health():
+    """Liveness: answers as long as the worker can serve requests"""
+    response = jsonify({'status': 'ok'})
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.route('/ready')
+@limiter.exempt
+def ready():
+    snapshot = readiness.snapshot()
+    response = jsonify(snapshot)
+    response.status_code = 200 if snapshot['ready'] else 503
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+class SamplingProfiler:
+    """Sample every thread's stack at a fixed interval, counting collapsed stacks
+    in the format flamegraph.pl and speedscope read ("outer;inner;leaf count").
+
+    Results are files in PROFILE_DIR named by run ID, so any worker can serve
+    a profile that another one recorded. <id>.running holds the expected end
+    time while a run is in progress, and <id>.failed the error if it crashed.
+    """
+
+    def __init__(self, directory, keep):
+        self.directory = directory
+        self.keep = keep
+        self.running = False
+        self._lock = threading.Lock()
+
+    def _path(self, run_id, suffix):
+        return os.path.join(self.directory, f'{run_id}.{suffix}')
+
+    def _write(self, run_id, suffix, text):
+        tmp_path = self._path(run_id, f'{suffix}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, self._path(run_id, suffix))
+
+    def start(self, seconds, interval):
+        """Start a run in this worker; returns its ID, or None if one is already running here"""
+        with self._lock:
+            if self.running:
+                return None
+            self.running = True
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            run_id = f'{time.strftime("%Y%m%dT%H%M%S")}-{os.getpid()}-{os.urandom(4).hex()}'
+            self._write(run_id, 'running', json.dumps({'pid': os.getpid(), 'ends': time.time() + seconds}))
+            threading.Thread(target=self._run, args=(run_id, seconds, interval), name='profiler', daemon=True).start()
+        except Exception:
+            self.running = False
+            raise
+        return run_id
+
+    def status(self, run_id):
+        """('done', collapsed text), ('running', None), ('failed', error) or ('missing', None)"""
+        try:
+            with open(self._path(run_id, 'txt')) as f:
+                return 'done', f.read()
+        except FileNotFoundError:
+            pass
+        try:
+            with open(self._path(run_id, 'failed')) as f:
+                return 'failed', f.read()
+        except FileNotFoundError:
+            pass
+        try:
+            with open(self._path(run_id, 'running')) as f:
+                marker = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return 'missing', None
+        if time.time() > marker['ends'] + 30:
+            return 'failed', f"Worker {marker['pid']} did not finish the profile"
+        return 'running', None
+
+    def latest(self):
+        """ID of the most recently completed profile, or None"""
+        try:
+            done = [name for name in os.listdir(self.directory) if name.endswith('.txt')]
+        except FileNotFoundError:
+            return None
+        return max(done)[:-len('.txt')] if done else None
+
+    @staticmethod
+    def _frame_label(frame):
+        code = frame.f_code
+        return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+    def _run(self, run_id, seconds, interval):
+        try:
+            self._write(run_id, 'txt', self._sample(seconds, interval))
+        except Exception as e:
+            app.logger.exception('Profile %s failed', run_id)
+            self._write(run_id, 'failed', str(e) or type(e).__name__)
+        finally:
+            try:
+                os.remove(self._path(run_id, 'running'))
+            except OSError:
+                pass
+            self.running = False
+        self._prune()
+
+    def _sample(self, seconds, interval):
+        me = threading.get_ident()
+        names = {}
+        stacks = {}
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(self._frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(ident, str(ident)))
+                stack = ';'.join(reversed(labels))
+                stacks[stack] = stacks.get(stack, 0) + 1
+            time.sleep(interval)
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(stacks.items()))
+
+    def _prune(self):
+        # Run IDs start with a timestamp, so name order is age order
+        done = sorted(name for name in os.listdir(self.directory) if name.endswith(('.txt', '.failed')))
+        for name in done[:-self.keep]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+profiler = SamplingProfiler(app.config['PROFILE_DIR'], app.config['PROFILE_KEEP'])
+
+@app.route('/api/admin/profile', methods=['POST'])
+@require_admin_token
+def start_profile():
+    """Start sampling this worker's threads; under gevent only OS threads are visible"""
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}
+    elif not isinstance(data, dict):
+        return jsonify({'error': 'JSON body must be an object', 'status': 400}), 400
+    try:
+        seconds = float(data.get('seconds', request.args.get('seconds', 10)))
+        interval_ms = float(data.get('interval_ms', request.args.get('interval_ms', 10)))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'seconds and interval_ms must be numbers', 'status': 400}), 400
+    
+    if not 0 < seconds <= app.config['PROFILE_MAX_SECONDS'] or not 1 <= interval_ms <= 1000:
+        return jsonify({
+            'error': f"seconds must be in (0, {app.config['PROFILE_MAX_SECONDS']:g}] and interval_ms in [1, 1000]",
+            'status': 400
+        }), 400
+    
+    run_id = profiler.start(seconds, interval_ms / 1000)
+    if run_id is None:
+        return jsonify({'error': 'A profile is already running in this worker', 'status': 409}), 409
+    
+    return jsonify({
+        'success': True,
+        'id': run_id,
+        'pid': os.getpid(),
+        'seconds': seconds,
+        'interval_ms': interval_ms,
+        'result_url': f'/api/admin/profile/{run_id}',
+        'message': 'GET result_url after the window for collapsed stacks'
+    }), 202
+
+@app.route('/api/admin/profile', methods=['GET'])
+@app.route('/api/admin/profile/<run_id>', methods=['GET'])
+@require_admin_token
+def get_profile(run_id=None):
+    """Collapsed stacks for a run, or for the latest completed run"""
+    run_id = run_id or profiler.latest()
+    if run_id is None or not run_id.replace('-', '').isalnum():
+        return jsonify({'error': 'No profile recorded', 'status': 404}), 404
+    
+    state, detail = profiler.status(run_id)
+    if state == 'running':
+        return jsonify({'success': True, 'id': run_id, 'running': True}), 202
+    if state == 'failed':
+        return jsonify({'error': f'Profile failed: {detail}', 'id': run_id, 'status': 500}), 500
+    if state == 'missing':
+        return jsonify({'error': 'No such profile', 'id': run_id, 'status': 404}), 404
+    
+    response = Response(detail, mimetype='text/plain')
+    response.headers['X-Profile-Id'] = run_id
+    return response
+
+@app.route('/metrics')
+@limiter.exempt
+def metrics():
+    return Response(generate_latest(metrics_registry()), content_type=CONTENT_TYPE_LATEST)
+
 # ==============================================
 # ERROR HANDLERS
 # ==============================================
@@ -1256,6 +4001,7 @@ def not_found(e):
 
 @app.errorhandler(429)
 def rate_limit_exceeded(e):
+    RATE_LIMITED.labels('anonymous', 'default').inc()  # per-IP default limits on non-API routes
     return jsonify({'error': 'Rate limit exceeded', 'status': 429}), 429
 
 @app.errorhandler(500)
@@ -0,0 +1,543 @@
+# bench.py - Benchmarks for Ntando Store API hot paths
+#
+# Usage: python bench.py <benchmark> [options]
+#        python bench.py --list
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BENCHMARKS = {}
+
+def benchmark(name, *arguments):
+    """Register a benchmark with its (flag, type, default, help) arguments"""
+    def register(func):
+        BENCHMARKS[name] = (func, arguments)
+        return func
+    return register
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def report(title, samples_ms, **extra):
+    print(f'{title}')
+    print(f'  samples: {len(samples_ms)}')
+    print(f'  p50: {percentile(samples_ms, 50):.3f} ms   p99: {percentile(samples_ms, 99):.3f} ms   '
+          f'max: {max(samples_ms, default=0):.3f} ms')
+    for key, value in extra.items():
+        print(f'  {key}: {value}')
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def bench_environment(data_folder):
+    """Environment for an app instance whose data lives in data_folder, plus an internal-tier key"""
+    env = dict(
+        os.environ,
+        DATA_FOLDER=data_folder,
+        CACHE_BACKEND='memory',
+        RATELIMIT_DEFAULT='1000 per second',
+        INTERNAL_RATE_LIMIT='1000 per second'  # headroom so the load test measures serving, not the limiter
+    )
+    subprocess.run(
+        [sys.executable, '-c', 'import app; app.key_store.add("bench-key", "bench@localhost", tier="internal")'],
+        env=env, cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+    )
+    return env
+
+# Random bytes compress about as badly as a real JPEG
+IMAGE_BYTES = random.Random(0).randbytes(256 * 1024)
+
+class SlowUpstream(BaseHTTPRequestHandler):
+    """Image host that answers HEAD or GET /<delay_ms>/<anything> after delay_ms"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        time.sleep(int(self.path.split('/')[1]) / 1000)
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(IMAGE_BYTES)))
+        self.end_headers()
+
+    def do_GET(self):
+        self.do_HEAD()
+        self.wfile.write(IMAGE_BYTES)
+
+def start_upstream():
+    server = ThreadingHTTPServer(('127.0.0.1', free_port()), SlowUpstream)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server on port {port} did not start')
+
+def run_load(port, paths, concurrency, headers=None):
+    """GET every path with `concurrency` keep-alive clients; returns (latencies ms, statuses, seconds)"""
+    local = threading.local()
+
+    def fetch(path):
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        started = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers or {})
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            local.conn = None
+            status = 0
+        return (time.perf_counter() - started) * 1000, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(fetch, paths))
+    elapsed = time.perf_counter() - started
+    return [r[0] for r in results], [r[1] for r in results], elapsed
+
+# ==============================================
+# SERVING MODES
+# ==============================================
+
+@benchmark(
+    'serving',
+    ('--modes', str, 'sync,gthread,gevent', 'comma-separated gunicorn worker classes'),
+    ('--workers', int, 4, 'gunicorn workers'),
+    ('--requests', int, 400, 'requests per mode'),
+    ('--concurrency', int, 100, 'concurrent clients'),
+    ('--upstream-ms', int, 200, 'upstream latency per HEAD probe')
+)
+def bench_serving(args):
+    """Throughput of /api/image/download against a slow upstream, per worker class"""
+    upstream = start_upstream()
+    env = bench_environment(tempfile.mkdtemp())
+    up_port = upstream.server_address[1]
+
+    for mode in args.modes.split(','):
+        port = free_port()
+        server = subprocess.Popen(
+            ['gunicorn', 'app:app', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+             '--workers', str(args.workers)],
+            env=dict(env, GUNICORN_WORKER_CLASS=mode),
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_for_port(port)
+            # Unique URLs, so the probe cache never answers
+            paths = [
+                f'/api/image/download?url=http://127.0.0.1:{up_port}/{args.upstream_ms}/{mode}-{i}.png'
+                for i in range(args.requests)
+            ]
+            samples, statuses, elapsed = run_load(port, paths, args.concurrency, {'X-API-Key': 'bench-key'})
+            report(
+                f'Serving mode: {mode} ({args.workers} workers, {args.concurrency} clients, '
+                f'{args.upstream_ms} ms upstream)',
+                samples,
+                requests_per_sec=round(len(samples) / elapsed, 1),
+                ok=f'{statuses.count(200)}/{len(statuses)}'
+            )
+        finally:
+            server.terminate()
+            server.wait()
+    upstream.shutdown()
+
+# ==============================================
+# RESPONSE CACHE
+# ==============================================
+
+STATIC_PATHS = (
+    '/',
+    '/generate-key',
+    '/api/ai/code-generate?language=python&task=sort',
+    '/api/youtube/search?q=lofi+beats',
+    '/api/qrcode?data=https://example.com',
+    '/api/media/resolve?url=https://youtu.be/dQw4w9WgXcQ',
+    '/api/tiktok/download?url=https://www.tiktok.com/@user/video/7234567890123456789',
+)
+
+@benchmark(
+    'responses',
+    ('--workers', int, 2, 'gunicorn workers'),
+    ('--requests', int, 4000, 'requests per mode'),
+    ('--concurrency', int, 16, 'concurrent clients')
+)
+def bench_responses(args):
+    """Requests/sec for static pages and API responses with the response cache off, on, and revalidating"""
+    env = bench_environment(tempfile.mkdtemp())
+    modes = (
+        ('cache off', {'RESPONSE_CACHE_SIZE': '0'}, False),
+        ('cache on', {}, False),
+        ('cache on, If-None-Match', {}, True),
+    )
+
+    for mode, overrides, revalidate in modes:
+        port = free_port()
+        server = subprocess.Popen(
+            ['gunicorn', 'app:app', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+             '--workers', str(args.workers)],
+            env=dict(env, **overrides),
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_for_port(port)
+            headers = {'X-API-Key': 'bench-key'}
+            paths = [STATIC_PATHS[i % len(STATIC_PATHS)] for i in range(args.requests)]
+            run_load(port, list(STATIC_PATHS) * args.workers * 2, args.concurrency, headers)  # warm up
+            if revalidate:
+                conn = http.client.HTTPConnection('127.0.0.1', port)
+                conn.request('GET', STATIC_PATHS[0], headers=headers)
+                response = conn.getresponse()
+                response.read()
+                headers['If-None-Match'] = response.getheader('ETag')
+                paths = [STATIC_PATHS[0]] * args.requests
+            samples, statuses, elapsed = run_load(port, paths, args.concurrency, headers)
+            report(
+                f'Static responses: {mode} ({args.workers} workers, {args.concurrency} clients)',
+                samples,
+                requests_per_sec=round(len(samples) / elapsed, 1),
+                statuses={status: statuses.count(status) for status in sorted(set(statuses))}
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+# ==============================================
+# COMPRESSION
+# ==============================================
+
+def _compression_endpoints(upstream):
+    image = f'http://127.0.0.1:{upstream}/0/photo.jpg'
+    return (
+        ('GET', '/', None),
+        ('GET', '/generate-key', None),
+        ('GET', '/api/media/resolve?url=https://youtu.be/dQw4w9WgXcQ', None),
+        ('GET', '/api/ai/code-generate?language=java&task=sort', None),
+        ('GET', '/api/system/caches', None),
+        ('POST', '/api/image/bulk-download', {'urls': [f'http://127.0.0.1:{upstream}/0/{i}.jpg' for i in range(50)]}),
+        ('POST', '/api/image/to-base64', {'url': image}),
+        ('POST', '/api/image/to-base64', {'url': image, 'stream': True}),
+    )
+
+@benchmark(
+    'compression',
+    ('--requests', int, 50, 'requests per endpoint and encoding'),
+    ('--encodings', str, 'identity,gzip,br', 'comma-separated Accept-Encoding values')
+)
+def bench_compression(args):
+    """Bytes on the wire and latency per endpoint for each Accept-Encoding"""
+    upstream = start_upstream()
+    env = bench_environment(tempfile.mkdtemp())
+    port = free_port()
+    server = subprocess.Popen(
+        ['gunicorn', 'app:app', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}', '--workers', '1'],
+        env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_port(port)
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        print(f'{"endpoint":<58} {"encoding":<9} {"bytes":>9} {"p50 ms":>8} {"p99 ms":>8}')
+        for method, path, payload in _compression_endpoints(upstream.server_address[1]):
+            body = json.dumps(payload) if payload is not None else None
+            label = f'{method} {path}' + (' (stream)' if payload and payload.get('stream') else '')
+            for encoding in args.encodings.split(','):
+                headers = {'X-API-Key': 'bench-key', 'Content-Type': 'application/json', 'Accept-Encoding': encoding}
+                samples, size = [], 0
+                for _ in range(args.requests + 1):
+                    started = time.perf_counter()
+                    conn.request(method, path, body=body, headers=headers)
+                    response = conn.getresponse()
+                    size = len(response.read())
+                    samples.append((time.perf_counter() - started) * 1000)
+                samples = samples[1:]  # the first request fills caches
+                print(f'{label[:58]:<58} {encoding:<9} {size:>9} '
+                      f'{percentile(samples, 50):>8.2f} {percentile(samples, 99):>8.2f}')
+    finally:
+        server.terminate()
+        server.wait()
+        upstream.shutdown()
+
+# ==============================================
+# URL SHORTENER
+# ==============================================
+
+@benchmark(
+    'redirects',
+    ('--workers', int, 2, 'gunicorn workers'),
+    ('--codes', int, 1000, 'short codes created up front'),
+    ('--hot', int, 50, 'codes the hot-set run cycles through'),
+    ('--requests', int, 4000, 'redirects per run'),
+    ('--concurrency', int, 16, 'concurrent clients')
+)
+def bench_redirects(args):
+    """GET /<code> throughput, hot codes from the LRU versus every lookup going to SQLite"""
+    env = bench_environment(tempfile.mkdtemp())
+    modes = (
+        ('hot codes, LRU', {}, args.hot),
+        ('all codes, LRU', {}, args.codes),
+        ('all codes, no LRU', {'SHORT_URL_CACHE_SIZE': '0'}, args.codes),
+    )
+    codes = []
+
+    for mode, overrides, spread in modes:
+        port = free_port()
+        server = subprocess.Popen(
+            ['gunicorn', 'app:app', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+             '--workers', str(args.workers)],
+            env=dict(env, **overrides),
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_for_port(port)
+            headers = {'X-API-Key': 'bench-key', 'Content-Type': 'application/json'}
+            while len(codes) < args.codes:
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                urls = [f'https://example.com/article/{len(codes) + i}' for i in range(100)]
+                conn.request('POST', '/api/shorten/bulk', body=json.dumps({'urls': urls}), headers=headers)
+                codes.extend(result['short_code'] for result in json.loads(conn.getresponse().read())['results'])
+            paths = [f'/{codes[i % spread]}' for i in range(args.requests)]
+            samples, statuses, elapsed = run_load(port, paths, args.concurrency)
+            report(
+                f'Redirects: {mode} ({args.workers} workers, {args.concurrency} clients, {spread} distinct codes)',
+                samples,
+                requests_per_sec=round(len(samples) / elapsed, 1),
+                redirected=f'{statuses.count(302)}/{len(statuses)}'
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+# ==============================================
+# URL CLASSIFIER
+# ==============================================
+
+def _legacy_classify(url):
+    # The per-call regex loops media_urls.classify_url replaced
+    for pattern in (
+        r'(?:youtube\.com\/watch\?v=|youtu\.be\/)([^&\n?#]+)',
+        r'youtube\.com\/embed\/([^&\n?#]+)',
+        r'youtube\.com\/v\/([^&\n?#]+)'
+    ):
+        match = re.search(pattern, url)
+        if match:
+            return match.group(1)
+    match = re.search(r'instagram\.com/(?:p|reel)/([A-Za-z0-9_-]+)', url)
+    return match.group(1) if match else None
+
+def url_corpus(size, seed=7):
+    rng = random.Random(seed)
+    alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-'
+
+    def code(n):
+        return ''.join(rng.choice(alphabet) for _ in range(n))
+
+    def digits(n):
+        return ''.join(rng.choice('0123456789') for _ in range(n))
+
+    real = [
+        lambda: f'https://www.youtube.com/watch?v={code(11)}&t={digits(3)}s',
+        lambda: f'https://youtu.be/{code(11)}?si={code(16)}',
+        lambda: f'https://m.youtube.com/shorts/{code(11)}',
+        lambda: f'https://www.youtube.com/embed/{code(11)}?autoplay=1',
+        lambda: f'https://www.instagram.com/p/{code(11)}/?igsh={code(12)}',
+        lambda: f'https://www.instagram.com/reel/{code(11)}/',
+        lambda: f'https://www.tiktok.com/@{code(8)}/video/{digits(19)}?lang=en',
+        lambda: f'https://vm.tiktok.com/{code(9)}/',
+        lambda: f'https://www.facebook.com/watch/?v={digits(15)}',
+        lambda: f'https://fb.watch/{code(10)}/',
+        lambda: f'https://x.com/{code(10)}/status/{digits(19)}',
+        lambda: f'https://example.com/{code(20)}?q={code(10)}',
+    ]
+    adversarial = [
+        lambda: 'https://www.youtube.com/watch?' + '&'.join(f'{code(3)}={code(5)}' for _ in range(150)),
+        lambda: 'https://youtube.com/' + '/' * 1500 + 'watch',
+        lambda: 'youtube.com/watch?v=' * 90,
+        lambda: 'https://www.instagram.com/' + 'p/' * 900,
+        lambda: 'a' * 2000,
+        lambda: 'http://' + 'x.' * 1000 + 'youtube.com/watch?v=' + code(11),
+    ]
+    corpus = [rng.choice(real)() for _ in range(size)]
+    corpus += [rng.choice(adversarial)() for _ in range(size // 10)]
+    rng.shuffle(corpus)
+    return corpus
+
+def _time_per_call(func, inputs, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for url in inputs:
+            func(url)
+        best = min(best, time.perf_counter() - started)
+    return best / len(inputs) * 1e6
+
+@benchmark(
+    'urls',
+    ('--size', int, 20000, 'real-world URLs in the corpus (plus 10%% adversarial)'),
+    ('--repeat', int, 5, 'passes over the corpus, best one reported')
+)
+def bench_urls(args):
+    """media_urls.classify_url against the old regex loops, plus length scaling"""
+    from media_urls import classify_url
+
+    corpus = url_corpus(args.size)
+    groups = (
+        ('real', [url for url in corpus if len(url) < 300]),
+        ('adversarial', [url for url in corpus if len(url) >= 300]),
+    )
+    print(f'URL classification over {len(corpus)} URLs (best of {args.repeat}), us/url')
+    for label, func in (('classify_url', classify_url), ('legacy regexes', _legacy_classify)):
+        timings = '  '.join(f'{name} {_time_per_call(func, urls, args.repeat):7.2f}' for name, urls in groups)
+        print(f'  {label:<15} {timings}')
+
+    # Linear-time check: cost per character should stay flat as inputs grow
+    from media_urls import URL_RE
+    print('  adversarial scaling (URL_RE on "//host/" + path of n chars):')
+    for n in (1000, 10000, 100000):
+        probe = ['//youtube.com/' + 'a/' * (n // 2) + '?' + 'v=' * (n // 4)]
+        per_call = _time_per_call(URL_RE.match, probe * 20, args.repeat)
+        print(f'    n={n:>6}: {per_call:9.2f} us   {per_call * 1000 / n:.3f} ns/char')
+
+# ==============================================
+# RATE LIMITER
+# ==============================================
+
+def _limiter_worker(uri, strategy, limit, threads, checks, rate, queue):
+    from concurrent.futures import ThreadPoolExecutor
+    from limits import parse
+    from limits.storage import storage_from_string
+    from limits.strategies import STRATEGIES
+
+    import sqlite_storage
+
+    storage = sqlite_storage.SQLiteLimiterStorage(uri) if uri.startswith('sqlite://') else storage_from_string(uri)
+    rate_limiter = STRATEGIES[strategy](storage)
+    item = parse(f'{limit} per hour')
+    interval = 1 / rate if rate else 0
+
+    def run(_):
+        samples, allowed = [], 0
+        next_check = time.perf_counter()
+        for _ in range(checks):
+            if interval:
+                # Paced like requests arriving at a server, so the CPU is not saturated by the bench itself
+                next_check += interval * random.uniform(0.5, 1.5)
+                time.sleep(max(0.0, next_check - time.perf_counter()))
+            started = time.perf_counter()
+            allowed += rate_limiter.hit(item, 'bench', 'shared-key')
+            samples.append((time.perf_counter() - started) * 1000)
+        return samples, allowed
+
+    with ThreadPoolExecutor(threads) as pool:
+        for samples, allowed in pool.map(run, range(threads)):
+            queue.put((samples, allowed))
+
+def _run_limiter(uri, args, limit):
+    queue = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(
+            target=_limiter_worker,
+            args=(uri, args.strategy, limit, args.threads, args.checks, args.rate, queue)
+        )
+        for _ in range(args.processes)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    samples, allowed = [], 0
+    for _ in range(args.processes * args.threads):
+        thread_samples, thread_allowed = queue.get()
+        samples.extend(thread_samples)
+        allowed += thread_allowed
+    for worker in workers:
+        worker.join()
+    return samples, allowed, time.perf_counter() - started
+
+@benchmark(
+    'limiter',
+    ('--processes', int, 4, 'worker processes sharing one limit'),
+    ('--threads', int, 4, 'threads per process'),
+    ('--checks', int, 500, 'checks per thread'),
+    ('--limit', int, 0, 'requests allowed per hour (default: every check is accepted, the write path)'),
+    ('--rate', float, 100, 'checks per second per thread (0: back to back, which measures CPU queueing)'),
+    ('--storage', str, '', 'storage URI (default: temporary sqlite file)'),
+    ('--strategy', str, 'sliding-window-counter', 'limits strategy')
+)
+def bench_limiter(args):
+    """Latency per limiter check across processes, against an in-process memory:// baseline"""
+    uri = args.storage or 'sqlite://' + os.path.join(tempfile.mkdtemp(), 'ratelimit.db')
+    total = args.processes * args.threads * args.checks
+    limit = args.limit or total
+
+    for label, target in (('baseline', 'memory://'), ('storage', uri)):
+        samples, allowed, elapsed = _run_limiter(target, args, limit)
+        extra = {}
+        if target != 'memory://':
+            # memory:// counts per process, so only the shared storage can be checked for correctness
+            extra['correct'] = allowed == min(limit, total)
+        report(
+            f'Rate limiter {label}: {target} ({args.strategy}, {args.rate:g} checks/s per thread)',
+            samples,
+            cpus=os.cpu_count(),
+            checks_per_sec=round(len(samples) / elapsed),
+            allowed=f'{allowed} (limit {limit})',
+            **extra
+        )
+
+# ==============================================
+# MAIN
+# ==============================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Ntando Store API benchmarks')
+    parser.add_argument('--list', action='store_true', help='list available benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark')
+    for name, (func, arguments) in BENCHMARKS.items():
+        subparser = subparsers.add_parser(name, help=func.__name__)
+        for flag, kind, default, help_text in arguments:
+            subparser.add_argument(flag, type=kind, default=default, help=help_text)
+
+    args = parser.parse_args(argv)
+    if args.list or not args.benchmark:
+        for name in BENCHMARKS:
+            print(name)
+        return 0
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    BENCHMARKS[args.benchmark][0](args)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+# extractor.py - yt-dlp extraction, run inside worker processes
+#
+# Kept free of Flask and app imports so a spawned worker only loads
+# yt-dlp, not the whole web application.
+import json
+import os
+from urllib.parse import parse_qs, urlsplit
+
+YDL_OPTIONS = {
+    'quiet': True,
+    'no_warnings': True,
+    'skip_download': True,
+    'noplaylist': True,
+}
+
+def load_info(video_id, fixture_dir=None):
+    """Raw yt-dlp info dict for a video, from a fixture file when fixture_dir is set"""
+    if fixture_dir:
+        with open(os.path.join(fixture_dir, f'{video_id}.json')) as f:
+            return json.load(f)
+
+    import yt_dlp
+    with yt_dlp.YoutubeDL(YDL_OPTIONS) as ydl:
+        return ydl.extract_info(f'https://www.youtube.com/watch?v={video_id}', download=False)
+
+def url_expiry(url):
+    """Unix time at which a signed googlevideo URL stops working, if it says"""
+    expire = parse_qs(urlsplit(url).query).get('expire')
+    try:
+        return int(expire[0]) if expire else None
+    except ValueError:
+        return None
+
+def extract_formats(video_id, fixture_dir=None):
+    info = load_info(video_id, fixture_dir)
+    formats = []
+    expires = []
+
+    for fmt in info.get('formats') or []:
+        url = fmt.get('url')
+        if not url or not fmt.get('protocol', 'https').startswith('http'):
+            continue
+        if fmt.get('width') and fmt.get('height'):
+            resolution = f"{fmt['width']}x{fmt['height']}"
+        else:
+            resolution = fmt.get('resolution') or 'audio only'
+        formats.append({
+            'itag': fmt.get('format_id'),
+            'ext': fmt.get('ext'),
+            'resolution': resolution,
+            'fps': fmt.get('fps'),
+            'vcodec': fmt.get('vcodec'),
+            'acodec': fmt.get('acodec'),
+            'bitrate': fmt.get('tbr'),
+            'filesize': fmt.get('filesize') or fmt.get('filesize_approx'),
+            'url': url
+        })
+        expiry = url_expiry(url)
+        if expiry:
+            expires.append(expiry)
+
+    return {
+        'video_id': video_id,
+        'title': info.get('title'),
+        'duration': info.get('duration'),
+        'formats': formats,
+        'expires': min(expires) if expires else None
+    }
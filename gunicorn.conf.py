@@ -0,0 +1,43 @@
+# gunicorn.conf.py - Worker settings, used by Procfile and render.yaml
+#
+# GUNICORN_WORKER_CLASS picks the serving mode:
+#   sync    - one request at a time per worker (the old default)
+#   gthread - a thread per in-flight request (default)
+#   gevent  - greenlets; requests, sockets and threads are monkey patched so
+#             one worker keeps hundreds of upstream calls in flight
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+# gunicorn silently turns sync into gthread when threads > 1
+threads = int(os.environ.get('GUNICORN_THREADS', 32)) if worker_class == 'gthread' else 1
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 500))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+keepalive = 5
+
+# Size the outbound pools to what one worker can have in flight, so
+# concurrent requests reuse connections instead of dialing new ones
+if worker_class == 'gevent':
+    in_flight = worker_connections
+elif worker_class == 'gthread':
+    in_flight = threads
+else:
+    in_flight = 1
+os.environ.setdefault('OUTBOUND_POOL_MAXSIZE', str(max(10, in_flight)))
+os.environ.setdefault('FANOUT_WORKERS', str(max(16, in_flight)))
+
+# Each worker writes its metrics under this directory and /metrics merges
+# them, so a scrape sees all workers rather than whichever one answered
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'ntando-metrics'))
+
+def on_starting(server):
+    # Files left by a previous run would be counted again
+    shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'])
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
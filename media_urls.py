@@ -0,0 +1,168 @@
+# media_urls.py - Single-pass media URL classification
+#
+# Every pattern here is compiled once at import and anchored at the start
+# of its input. Adjacent groups are separated by characters the previous
+# group cannot match, so a failed branch is abandoned after one scan and
+# matching stays linear in the URL length. URLs are also capped at
+# MAX_URL_LENGTH before any matching happens.
+import re
+from collections import namedtuple
+
+MAX_URL_LENGTH = 2048
+
+MediaRef = namedtuple('MediaRef', ['platform', 'kind', 'id'])
+
+# (scheme:)//? host port? path? query? fragment?
+URL_RE = re.compile(
+    r'(?:(?:[A-Za-z][A-Za-z0-9+.-]*:)?//)?'
+    r'(?P<host>[^/?#:@\s]+)'
+    r'(?::[0-9]*)?'
+    r'(?P<path>/[^?#\s]*)?'
+    r'(?:\?(?P<query>[^#\s]*))?'
+    r'(?:#\S*)?'
+)
+
+YOUTUBE_ID_RE = re.compile(r'[A-Za-z0-9_-]{11}')
+SHORTCODE_RE = re.compile(r'[A-Za-z0-9_-]{1,64}')
+NUMERIC_ID_RE = re.compile(r'[0-9]{1,25}')
+
+# Subdomains that serve the same content as the bare domain
+HOST_PREFIXES = frozenset(('www.', 'm.', 'mobile.', 'music.', 'web.', 'business.'))
+
+HOSTS = {
+    'youtube.com': 'youtube',
+    'youtube-nocookie.com': 'youtube',
+    'youtu.be': 'youtube',
+    'instagram.com': 'instagram',
+    'instagr.am': 'instagram',
+    'tiktok.com': 'tiktok',
+    'vm.tiktok.com': 'tiktok',
+    'vt.tiktok.com': 'tiktok',
+    'facebook.com': 'facebook',
+    'fb.com': 'facebook',
+    'fb.watch': 'facebook',
+    'twitter.com': 'twitter',
+    'x.com': 'twitter',
+}
+
+CANONICAL_URLS = {
+    ('youtube', 'video'): 'https://www.youtube.com/watch?v={}',
+    ('youtube', 'short'): 'https://www.youtube.com/shorts/{}',
+    ('instagram', 'post'): 'https://www.instagram.com/p/{}/',
+    ('instagram', 'reel'): 'https://www.instagram.com/reel/{}/',
+    ('instagram', 'tv'): 'https://www.instagram.com/tv/{}/',
+    ('tiktok', 'video'): 'https://www.tiktok.com/@/video/{}',
+    ('tiktok', 'share'): 'https://vm.tiktok.com/{}/',
+    ('facebook', 'video'): 'https://www.facebook.com/watch/?v={}',
+    ('facebook', 'reel'): 'https://www.facebook.com/reel/{}',
+    ('facebook', 'share'): 'https://fb.watch/{}/',
+    ('twitter', 'status'): 'https://x.com/i/status/{}',
+}
+
+def _query_param(query, name):
+    if not query:
+        return None
+    for pair in query.split('&'):
+        key, _, value = pair.partition('=')
+        if key == name:
+            return value
+    return None
+
+def _match(pattern, value):
+    return value if value and pattern.fullmatch(value) else None
+
+def _youtube(host, segments, query):
+    if host == 'youtu.be':
+        video_id = _match(YOUTUBE_ID_RE, segments[0])
+        return ('video', video_id) if video_id else None
+    head = segments[0]
+    if head == 'watch':
+        return 'video', _match(YOUTUBE_ID_RE, _query_param(query, 'v'))
+    if head in ('embed', 'v', 'e', 'live') and len(segments) > 1:
+        return 'video', _match(YOUTUBE_ID_RE, segments[1])
+    if head == 'shorts' and len(segments) > 1:
+        return 'short', _match(YOUTUBE_ID_RE, segments[1])
+    return None
+
+INSTAGRAM_KINDS = {'p': 'post', 'reel': 'reel', 'reels': 'reel', 'tv': 'tv'}
+
+def _instagram(host, segments, query):
+    # /p/<code>/ or /<username>/p/<code>/
+    for index in (0, 1):
+        if index + 1 < len(segments) and segments[index] in INSTAGRAM_KINDS:
+            return INSTAGRAM_KINDS[segments[index]], _match(SHORTCODE_RE, segments[index + 1])
+    return None
+
+def _tiktok(host, segments, query):
+    if host in ('vm.tiktok.com', 'vt.tiktok.com'):
+        return 'share', _match(SHORTCODE_RE, segments[0])
+    head = segments[0]
+    if head == 't' and len(segments) > 1:
+        return 'share', _match(SHORTCODE_RE, segments[1])
+    if head == 'v' and len(segments) > 1:
+        return 'video', _match(NUMERIC_ID_RE, segments[1].removesuffix('.html'))
+    if head.startswith('@') and len(segments) > 2 and segments[1] in ('video', 'photo'):
+        return 'video', _match(NUMERIC_ID_RE, segments[2])
+    return None
+
+def _facebook(host, segments, query):
+    if host == 'fb.watch':
+        return 'share', _match(SHORTCODE_RE, segments[0])
+    head = segments[0]
+    if head in ('watch', 'video.php'):
+        return 'video', _match(NUMERIC_ID_RE, _query_param(query, 'v'))
+    if head == 'reel' and len(segments) > 1:
+        return 'reel', _match(NUMERIC_ID_RE, segments[1])
+    if head == 'share' and len(segments) > 2 and segments[1] in ('v', 'r'):
+        return 'share', _match(SHORTCODE_RE, segments[2])
+    # /<page>/videos/<id>/ or /<page>/videos/<slug>/<id>/
+    if len(segments) > 2 and segments[1] == 'videos':
+        return 'video', _match(NUMERIC_ID_RE, segments[-1]) or _match(NUMERIC_ID_RE, segments[2])
+    return None
+
+def _twitter(host, segments, query):
+    # /<user>/status/<id>, /i/status/<id>, /i/web/status/<id>
+    for index in (1, 2):
+        if index + 1 < len(segments) and segments[index] in ('status', 'statuses'):
+            return 'status', _match(NUMERIC_ID_RE, segments[index + 1])
+    return None
+
+RESOLVERS = {
+    'youtube': _youtube,
+    'instagram': _instagram,
+    'tiktok': _tiktok,
+    'facebook': _facebook,
+    'twitter': _twitter,
+}
+
+def classify_url(url):
+    """Identify a media URL: MediaRef(platform, kind, id), or None if unrecognised"""
+    if not url or len(url) > MAX_URL_LENGTH:
+        return None
+    parts = URL_RE.match(url.strip())
+    if parts is None:
+        return None
+
+    host, path, query = parts.group('host', 'path', 'query')
+    host = host.lower()
+    platform = HOSTS.get(host)
+    if platform is None:
+        prefix = host[:host.find('.') + 1]
+        if prefix in HOST_PREFIXES:
+            host = host[len(prefix):]
+            platform = HOSTS.get(host)
+        if platform is None:
+            return None
+
+    segments = path.split('/')[1:] if path else []
+    if '' in segments:
+        segments = [segment for segment in segments if segment]
+    if not segments:
+        return None
+    match = RESOLVERS[platform](host, segments, query)
+    if match is None or match[1] is None:
+        return None
+    return MediaRef(platform, match[0], match[1])
+
+def canonical_url(ref):
+    return CANONICAL_URLS[(ref.platform, ref.kind)].format(ref.id)
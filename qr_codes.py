@@ -0,0 +1,82 @@
+# qr_codes.py - QR code rendering to PNG and SVG
+#
+# segno builds the module matrix; the renderers here never touch individual
+# pixels in Python. A PNG scanline is assembled from two precomputed module
+# strips (one dark, one light, each `scale` pixels wide) and then repeated
+# `scale` times, and an SVG gets one path segment per horizontal run of
+# dark modules. Kept free of Flask so it can be benchmarked on its own.
+import re
+import struct
+import zlib
+
+import segno
+
+ECC_LEVELS = ('l', 'm', 'q', 'h')
+BORDER = 4  # quiet zone in modules, as the spec requires
+MIN_SIZE = 21 + 2 * BORDER  # a version 1 symbol at one pixel per module
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+DARK_RUN_RE = re.compile(rb'\x01+')
+
+def encode(data, ecc='m'):
+    """Module matrix for data (tuple of bytearrays, 1 = dark), without the quiet zone
+
+    Raises ValueError if data does not fit a version 40 symbol at this ecc level.
+    """
+    return segno.make(data, error=ecc, micro=False, boost_error=False).matrix
+
+class SymbolTooLarge(ValueError):
+    def __init__(self, min_size):
+        super().__init__(f'QR code needs at least {min_size} pixels')
+        self.min_size = min_size
+
+def module_scale(matrix, size):
+    """Pixels per module so the symbol plus quiet zone fits in size pixels
+
+    Raises SymbolTooLarge if it cannot fit even at one pixel per module.
+    """
+    dimension = len(matrix) + 2 * BORDER
+    if dimension > size:
+        raise SymbolTooLarge(dimension)
+    return size // dimension
+
+def _png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+def render_png(matrix, scale, level=6):
+    """8-bit grayscale PNG with each module drawn as a scale x scale square"""
+    width = (len(matrix) + 2 * BORDER) * scale
+    strips = (b'\xff' * scale, b'\x00' * scale)
+    margin = b'\xff' * (BORDER * scale)
+    blank = (b'\x00' + b'\xff' * width) * (BORDER * scale)
+
+    # Filter byte 0 (none) + pixels; each module row becomes `scale` identical scanlines
+    rows = [blank]
+    for row in matrix:
+        line = b''.join((b'\x00', margin, b''.join(map(strips.__getitem__, row)), margin))
+        rows.append(line * scale)
+    rows.append(blank)
+
+    header = struct.pack('>IIBBBBB', width, width, 8, 0, 0, 0, 0)
+    return b''.join((
+        PNG_SIGNATURE,
+        _png_chunk(b'IHDR', header),
+        _png_chunk(b'IDAT', zlib.compress(b''.join(rows), level)),
+        _png_chunk(b'IEND', b''),
+    ))
+
+def render_svg(matrix, size):
+    """SVG drawing the dark modules as a single path, scaled to size pixels"""
+    dimension = len(matrix) + 2 * BORDER
+    if dimension > size:
+        raise SymbolTooLarge(dimension)
+    segments = []
+    for y, row in enumerate(matrix, BORDER):
+        for run in DARK_RUN_RE.finditer(row):
+            segments.append(f'M{run.start() + BORDER} {y}h{run.end() - run.start()}v1H{run.start() + BORDER}z')
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+        f'viewBox="0 0 {dimension} {dimension}" shape-rendering="crispEdges">'
+        f'<rect width="100%" height="100%" fill="#fff"/>'
+        f'<path fill="#000" d="{"".join(segments)}"/></svg>'
+    ).encode()
@@ -0,0 +1,216 @@
+# sqlite_storage.py - SQLite-backed storage shared by every worker
+#
+# SQLiteDatabase hands out per-thread WAL-mode connections to one file, and
+# SQLiteLimiterStorage keeps Flask-Limiter counters in such a file. Importing
+# this module registers the sqlite:// scheme with limits, without pulling in
+# the web application.
+import os
+import fcntl
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from limits.storage import Storage, SlidingWindowCounterSupport
+from limits.storage.base import TimestampedSlidingWindow
+
+class SQLiteDatabase:
+    """Per-thread connections to one WAL-mode SQLite file shared by all workers"""
+
+    def __init__(self, path, schema='', synchronous='NORMAL'):
+        self.path = path
+        self.schema = schema
+        self.synchronous = synchronous
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'PRAGMA synchronous={self.synchronous}')
+            if self.schema:
+                conn.executescript(self.schema)
+            self._local.conn = conn
+        return conn
+
+    def execute(self, sql, params=()):
+        return self.connection().execute(sql, params)
+
+LIMITER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (
+    key TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    expires REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+def _gevent_patched():
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('time')
+
+def _flock_cooperative(lock_file, max_delay=0.01):
+    """Take an exclusive flock() by polling, so a monkey-patched sleep yields to other greenlets"""
+    delay = 0.0005
+    while True:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return
+        except BlockingIOError:
+            time.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+class SQLiteLimiterStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Rate limit counters in a local SQLite file, so every gunicorn worker
+    enforces the same budget without an external service.
+
+    Built for the sync and gthread workers. It does NOT meet a 1 ms p99
+    target under contention; use redis:// storage where that matters.
+    bench.py limiter on one CPU, 4 processes x 4 threads, every check
+    accepted (the write path):
+      - paced at 1,600 checks/s: p50 about 0.17 ms, p99 0.5-3 ms, against
+        0.7-3 ms for an in-process memory:// baseline on the same machine
+      - back to back (--rate 0): p99 10-40 ms, memory:// about 4 ms
+    Writers queue on the file lock and the OS decides who runs next.
+    On gevent workers a blocking flock() would stall every greenlet in the
+    worker, so waiters poll with a cooperative sleep instead; SQLite calls
+    themselves still run on the hub.
+    """
+
+    STORAGE_SCHEME = ['sqlite']
+    PURGE_EVERY = 1000  # increments between sweeps of expired counters
+
+    def __init__(self, uri, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        # Counters are worth losing on power failure in exchange for no fsync during WAL checkpoints
+        self._db = SQLiteDatabase(uri[len('sqlite://'):], LIMITER_SCHEMA, synchronous='OFF')
+        self._lock_path = self._db.path + '.lock'
+        self._lock_file = None
+        self._lock_pid = None
+        self._thread_lock = threading.Lock()
+        self._local = threading.local()
+        self._incrs = 0
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    @contextmanager
+    def _write_lock(self):
+        """
+        Serialize writers with a thread lock plus flock() across workers.
+        Waiters are woken as soon as the lock is released, instead of
+        polling in SQLite's busy handler, which sleeps in 1-100 ms steps.
+        """
+        with self._thread_lock:
+            if self._lock_pid != os.getpid():
+                self._lock_file = open(self._lock_path, 'a')
+                self._lock_pid = os.getpid()
+            if _gevent_patched():
+                _flock_cooperative(self._lock_file)
+            else:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _write_transaction(self):
+        """Connection inside a BEGIN IMMEDIATE transaction, joining the thread's open one if any"""
+        conn = self._db.connection()
+        if getattr(self._local, 'active', False):
+            yield conn
+            return
+        with self._write_lock(), conn:
+            conn.execute('BEGIN IMMEDIATE')
+            self._local.active = True
+            try:
+                yield conn
+            finally:
+                self._local.active = False
+
+    def transaction(self):
+        """
+        Run every check and hit in the block as one write transaction, so
+        several limits cost one lock and one commit and are consumed together.
+        """
+        return self._write_transaction()
+
+    def _incr(self, conn, key, expiry, amount, now):
+        conn.execute(
+            'INSERT INTO counters (key, count, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET '
+            'count = CASE WHEN expires <= ? THEN excluded.count ELSE count + excluded.count END, '
+            'expires = CASE WHEN expires <= ? THEN excluded.expires ELSE expires END',
+            (key, amount, now + expiry, now, now)
+        )
+        self._incrs += 1
+        if self._incrs % self.PURGE_EVERY == 0:
+            conn.execute('DELETE FROM counters WHERE expires <= ?', (now,))
+
+    def _counter(self, conn, key, now):
+        row = conn.execute('SELECT count, expires FROM counters WHERE key = ? AND expires > ?', (key, now)).fetchone()
+        return row or (0, now)
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        with self._write_transaction() as conn:
+            self._incr(conn, key, expiry, amount, now)
+            return self._counter(conn, key, now)[0]
+
+    def get(self, key):
+        return self._counter(self._db.connection(), key, time.time())[0]
+
+    def get_expiry(self, key):
+        return self._counter(self._db.connection(), key, time.time())[1]
+
+    def check(self):
+        self._db.execute('SELECT 1').fetchone()
+        return True
+
+    def reset(self):
+        return self._db.execute('DELETE FROM counters').rowcount
+
+    def clear(self, key):
+        self._db.execute('DELETE FROM counters WHERE key = ?', (key,))
+
+    def _sliding_window(self, conn, key, expiry, now):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self._counter(conn, previous_key, now)[0]
+        current_count = self._counter(conn, current_key, now)[0]
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        conn = self._db.connection()
+        now = time.time()
+        # Rejections are decided from a lock-free WAL read; only a likely
+        # acceptance takes the write lock and re-checks under it.
+        if not self._window_allows(conn, key, limit, expiry, amount, now):
+            return False
+        with self._write_transaction() as conn:
+            if not self._window_allows(conn, key, limit, expiry, amount, now):
+                return False
+            self._incr(conn, self.sliding_window_keys(key, expiry, now)[1], 2 * expiry, amount, now)
+            return True
+
+    def _window_allows(self, conn, key, limit, expiry, amount, now):
+        previous_count, previous_ttl, current_count, _ = self._sliding_window(conn, key, expiry, now)
+        weighted_count = previous_count * previous_ttl / expiry + current_count
+        return int(weighted_count) + amount <= limit
+
+    def get_sliding_window(self, key, expiry):
+        return self._sliding_window(self._db.connection(), key, expiry, time.time())
+
+    def clear_sliding_window(self, key, expiry):
+        for window_key in self.sliding_window_keys(key, expiry, time.time()):
+            self.clear(window_key)
@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# app.py reads its configuration at import time, so point every data path at
+# a scratch directory before any test imports it
+DATA_FOLDER = tempfile.mkdtemp(prefix='ntando-tests-')
+os.environ.setdefault('DATA_FOLDER', DATA_FOLDER)
+os.environ.setdefault('MEDIA_CACHE_DIR', os.path.join(DATA_FOLDER, 'media-cache'))
+os.environ.setdefault('CACHE_BACKEND', 'memory')
+os.environ.setdefault('RATELIMIT_STORAGE_URI', 'memory://')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def app_module():
+    import app
+    return app
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+@pytest.fixture
+def api_headers(app_module):
+    # Internal tier, so the suite as a whole stays inside its rate limits
+    app_module.key_store.add('tests-key', 'tests@localhost', tier='internal')
+    return {'X-API-Key': 'tests-key'}
@@ -0,0 +1,51 @@
+import threading
+
+def test_cached_fan_out_fetches_each_unique_miss_once(app_module):
+    cache = {'a': 'cached-a', 'none': None}
+    loads = []
+    lock = threading.Lock()
+
+    def lookup(key):
+        return cache.get(key, app_module._MISSING)
+
+    def load(key):
+        with lock:
+            loads.append(key)
+        if key == 'bad':
+            raise RuntimeError('upstream down')
+        return f'loaded-{key}'
+
+    found, fetched = app_module.cached_fan_out(['a', 'b', 'b', 'none', 'bad', 'a'], lookup, load, 5)
+
+    assert sorted(loads) == ['b', 'bad']
+    assert fetched == 2
+    assert found == {
+        'a': ('cached-a', True, None),
+        'none': (None, True, None),
+        'b': ('loaded-b', False, None),
+        'bad': (None, False, 'upstream down'),
+    }
+
+def test_youtube_info_batch_answers_duplicates_from_one_fetch(app_module, client, api_headers, monkeypatch):
+    fetched = []
+
+    def fake_fetch(video_id):
+        fetched.append(video_id)
+        data = {'title': f'Video {video_id}', 'author_name': 'Someone', 'thumbnail_url': 'https://i.ytimg.com/x.jpg'}
+        app_module.oembed_cache.set(video_id, data)
+        return data
+
+    monkeypatch.setattr(app_module, 'fetch_oembed', fake_fetch)
+    video_id = 'aBcDeFgHiJk'
+    app_module.oembed_cache.delete(video_id)
+    urls = [f'https://youtu.be/{video_id}', f'https://www.youtube.com/watch?v={video_id}', 'not a video']
+
+    body = client.post('/api/youtube/info/batch', json={'urls': urls}, headers=api_headers).get_json()
+    assert fetched == [video_id]
+    assert (body['total'], body['unique'], body['fetched']) == (3, 1, 1)
+    assert [result['success'] for result in body['results']] == [True, True, False]
+    assert body['results'][2]['status'] == 400
+
+    body = client.post('/api/youtube/info/batch', json={'urls': urls[:1]}, headers=api_headers).get_json()
+    assert body['fetched'] == 0
+    assert body['results'][0]['cached'] is True
@@ -0,0 +1,47 @@
+from decimal import Decimal
+
+import pytest
+
+def test_snapshot_precomputes_exact_cross_rates(app_module):
+    snapshot = app_module.build_rate_snapshot('usd', {'ZWL': '320.0', 'eur ': Decimal('0.85')}, 'test')
+
+    assert snapshot.base == 'USD'
+    assert snapshot.currencies == ('EUR', 'USD', 'ZWL')
+    rate, display = snapshot.cross[('EUR', 'ZWL')]
+    assert rate == Decimal('320.0') / Decimal('0.85')
+    assert display == '376.470588'
+    assert snapshot.cross[('USD', 'USD')] == (Decimal(1), '1.000000')
+
+def test_snapshot_is_read_only(app_module):
+    snapshot = app_module.build_rate_snapshot('USD', {'EUR': '0.85'}, 'test')
+    with pytest.raises(TypeError):
+        snapshot.cross[('USD', 'EUR')] = (Decimal(2), '2')
+
+@pytest.mark.parametrize('rate', ['0', '-1', 'NaN', 'Infinity'])
+def test_snapshot_rejects_bad_rates(app_module, rate):
+    with pytest.raises(ValueError):
+        app_module.build_rate_snapshot('USD', {'EUR': rate}, 'test')
+
+@pytest.mark.parametrize('pair, amount, expected', [
+    (('EUR', 'ZWL'), '999999999999.99', '376470588235290.35'),  # beyond what a double holds exactly
+    (('EUR', 'ZWL'), '0.01', '3.76'),
+    (('USD', 'EUR'), '0.03', '0.03'),  # 0.0255: half-even would give 0.02
+])
+def test_conversions_round_half_up_to_cents(app_module, pair, amount, expected):
+    rate, _ = app_module.build_rate_snapshot('USD', {'ZWL': '320.0', 'EUR': '0.85'}, 'test').cross[pair]
+    converted = (app_module.parse_amount(amount) * rate).quantize(app_module.CENTS, app_module.ROUND_HALF_UP)
+    assert format(converted, 'f') == expected
+
+@pytest.mark.parametrize('value', ['abc', '', 'NaN', '1e13', True, None])
+def test_parse_amount_rejects_non_numbers_and_huge_values(app_module, value):
+    assert app_module.parse_amount(value) is None
+
+def test_get_returns_numbers_and_batch_returns_exact_strings(client, api_headers):
+    body = client.get('/api/currency?from=USD&to=ZAR&amount=100', headers=api_headers).get_json()
+    assert (body['amount'], body['converted'], body['rate']) == (100.0, 1850.0, 18.5)
+
+    body = client.post('/api/currency/batch', headers=api_headers, json={
+        'conversions': [{'from': 'EUR', 'to': 'ZWL', 'amount': '999999999999.99'}, {'from': 'EUR', 'to': 'XXX'}]
+    }).get_json()
+    assert body['results'][0]['converted'] == '376470588235290.35'
+    assert body['results'][1]['success'] is False
@@ -0,0 +1,50 @@
+import pytest
+
+from media_urls import MAX_URL_LENGTH, MediaRef, canonical_url, classify_url
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=42s', ('youtube', 'video', 'dQw4w9WgXcQ')),
+    ('https://youtu.be/dQw4w9WgXcQ?si=abc', ('youtube', 'video', 'dQw4w9WgXcQ')),
+    ('youtube.com/embed/dQw4w9WgXcQ', ('youtube', 'video', 'dQw4w9WgXcQ')),
+    ('https://m.youtube.com/shorts/dQw4w9WgXcQ', ('youtube', 'short', 'dQw4w9WgXcQ')),
+    ('https://music.youtube.com/watch?list=x&v=dQw4w9WgXcQ', ('youtube', 'video', 'dQw4w9WgXcQ')),
+    ('https://www.instagram.com/p/CxYz123AbC/', ('instagram', 'post', 'CxYz123AbC')),
+    ('https://www.instagram.com/someone/reel/Cq9_kL-2xYz/', ('instagram', 'reel', 'Cq9_kL-2xYz')),
+    ('https://www.tiktok.com/@user/video/7234567890123456789', ('tiktok', 'video', '7234567890123456789')),
+    ('https://vm.tiktok.com/ZMabc123/', ('tiktok', 'share', 'ZMabc123')),
+    ('https://www.facebook.com/SomePage/videos/a-slug/123456789/', ('facebook', 'video', '123456789')),
+    ('https://fb.watch/abcDEF123/', ('facebook', 'share', 'abcDEF123')),
+    ('https://x.com/i/web/status/1234567890123456789', ('twitter', 'status', '1234567890123456789')),
+    ('HTTPS://WWW.YOUTUBE.COM//watch?v=dQw4w9WgXcQ', ('youtube', 'video', 'dQw4w9WgXcQ')),
+])
+def test_recognised_urls(url, expected):
+    assert classify_url(url) == MediaRef(*expected)
+
+@pytest.mark.parametrize('url', [
+    '',
+    'not a url',
+    'https://example.com/watch?v=dQw4w9WgXcQ',
+    'https://notyoutube.com/watch?v=dQw4w9WgXcQ',
+    'https://www.youtube.com/watch?v=tooshort',
+    'https://www.youtube.com/',
+    'https://www.instagram.com/someone/',
+    'https://www.tiktok.com/@user/video/notnumeric',
+    'https://x.com/someone',
+])
+def test_unrecognised_urls(url):
+    assert classify_url(url) is None
+
+def test_overlong_urls_are_rejected_before_matching():
+    url = 'https://youtu.be/dQw4w9WgXcQ?' + 'a' * MAX_URL_LENGTH
+    assert classify_url(url) is None
+
+@pytest.mark.parametrize('url', [
+    'https://youtu.be/dQw4w9WgXcQ',
+    'https://www.instagram.com/reel/Cq9_kL-2xYz/',
+    'https://vm.tiktok.com/ZMabc123/',
+    'https://www.facebook.com/watch/?v=123456789012345',
+    'https://twitter.com/someone/status/1234567890123456789',
+])
+def test_canonical_urls_classify_to_the_same_ref(url):
+    ref = classify_url(url)
+    assert classify_url(canonical_url(ref)) == ref
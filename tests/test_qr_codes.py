@@ -0,0 +1,69 @@
+import struct
+import zlib
+
+import pytest
+
+import qr_codes
+
+def decode_png(png):
+    """(width, height, rows of grayscale bytes) for the 8-bit grayscale PNGs render_png writes"""
+    assert png.startswith(qr_codes.PNG_SIGNATURE)
+    chunks = {}
+    offset = len(qr_codes.PNG_SIGNATURE)
+    while offset < len(png):
+        length, = struct.unpack('>I', png[offset:offset + 4])
+        kind = png[offset + 4:offset + 8]
+        data = png[offset + 8:offset + 8 + length]
+        crc, = struct.unpack('>I', png[offset + 8 + length:offset + 12 + length])
+        assert crc == zlib.crc32(kind + data)
+        chunks[kind] = chunks.get(kind, b'') + data
+        offset += 12 + length
+    width, height, depth, color, _, _, _ = struct.unpack('>IIBBBBB', chunks[b'IHDR'])
+    assert (depth, color) == (8, 0)
+    raw = zlib.decompress(chunks[b'IDAT'])
+    stride = width + 1
+    assert all(raw[row * stride] == 0 for row in range(height))  # filter type none
+    return width, height, [raw[row * stride + 1:(row + 1) * stride] for row in range(height)]
+
+@pytest.mark.parametrize('scale', [1, 3])
+def test_png_pixels_match_the_module_matrix(scale):
+    matrix = qr_codes.encode('https://example.com', 'm')
+    width, height, rows = decode_png(qr_codes.render_png(matrix, scale))
+
+    border = qr_codes.BORDER * scale
+    assert width == height == (len(matrix) + 2 * qr_codes.BORDER) * scale
+    for y in range(height):
+        for x in range(width):
+            module_y, module_x = (y - border) // scale, (x - border) // scale
+            inside = 0 <= module_y < len(matrix) and 0 <= module_x < len(matrix)
+            dark = inside and matrix[module_y][module_x]
+            assert rows[y][x] == (0 if dark else 255)
+
+def test_module_scale_fits_the_symbol_and_quiet_zone():
+    matrix = qr_codes.encode('hi', 'm')
+    dimension = len(matrix) + 2 * qr_codes.BORDER
+    assert dimension == qr_codes.MIN_SIZE
+    assert qr_codes.module_scale(matrix, 300) == 300 // dimension
+    assert qr_codes.module_scale(matrix, dimension) == 1
+    with pytest.raises(qr_codes.SymbolTooLarge) as error:
+        qr_codes.module_scale(matrix, dimension - 1)
+    assert error.value.min_size == dimension
+
+def test_svg_draws_one_segment_per_dark_run():
+    matrix = qr_codes.encode('hi', 'h')
+    svg = qr_codes.render_svg(matrix, 200).decode()
+    runs = sum(len(qr_codes.DARK_RUN_RE.findall(row)) for row in matrix)
+    assert svg.count('M') == runs
+    assert 'width="200" height="200"' in svg
+
+def test_data_too_long_raises_value_error():
+    with pytest.raises(ValueError):
+        qr_codes.encode('x' * 5000, 'h')
+
+def test_endpoint_reports_rendered_size(client, api_headers):
+    body = client.get('/api/qrcode?data=hi&size=300&format=json', headers=api_headers).get_json()
+    assert (body['size'], body['requested_size']) == (290, 300)
+
+    response = client.get('/api/qrcode?data=' + 'x' * 300 + '&size=40', headers=api_headers)
+    assert response.status_code == 400
+    assert response.get_json()['min_size'] > 40
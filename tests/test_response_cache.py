@@ -0,0 +1,17 @@
+def test_code_generate_echoes_inputs_as_sent(client, api_headers):
+    first = client.get('/api/ai/code-generate?language=Python&task=Hello%20%20World', headers=api_headers)
+    second = client.get('/api/ai/code-generate?language=python&task=hello world', headers=api_headers)
+
+    assert (first.get_json()['language'], first.get_json()['task']) == ('Python', 'Hello  World')
+    assert (second.get_json()['language'], second.get_json()['task']) == ('python', 'hello world')
+    assert first.get_json()['code'] == second.get_json()['code'] == 'print("Hello, World!")'
+
+def test_cached_api_responses_are_private(client, api_headers):
+    for _ in range(2):
+        response = client.get('/api/youtube/search?q=lofi beats', headers=api_headers)
+        assert response.headers['Cache-Control'].startswith('private,')
+    assert response.headers['X-Cache'] == 'HIT'
+    assert response.get_json()['query'] == 'lofi beats'
+
+def test_static_pages_stay_public(client):
+    assert client.get('/').headers['Cache-Control'].startswith('public,')
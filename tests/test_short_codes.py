@@ -0,0 +1,31 @@
+import pytest
+
+@pytest.mark.parametrize('row_id', [1, 2, 61, 62, 3_843, 1_000_000, 62 ** 7 - 1])
+def test_codes_round_trip(app_module, row_id):
+    code = app_module.encode_short_code(row_id)
+    assert len(code) == 7
+    assert set(code) <= set(app_module.BASE62)
+    assert app_module.decode_short_code(code) == row_id
+
+def test_consecutive_ids_get_distinct_unrelated_codes(app_module):
+    codes = [app_module.encode_short_code(row_id) for row_id in range(1, 1001)]
+    assert len(set(codes)) == len(codes)
+    # Neighbouring rows should not share a prefix, so codes cannot be walked
+    assert sum(a[:3] == b[:3] for a, b in zip(codes, codes[1:])) < 10
+
+@pytest.mark.parametrize('code', ['', 'abc', 'abcdefgh', 'abc-efg', 'abc efg', '0000000'])
+def test_codes_we_never_issue_decode_to_none(app_module, code):
+    assert app_module.decode_short_code(code) is None
+
+def test_shorten_and_follow(client, api_headers):
+    response = client.post('/api/shorten', json={'url': 'https://example.com/a/long/path?q=1'}, headers=api_headers)
+    assert response.status_code == 200
+    code = response.get_json()['short_code']
+
+    again = client.post('/api/shorten', json={'url': 'https://example.com/a/long/path?q=1'}, headers=api_headers)
+    assert again.get_json()['short_code'] == code
+
+    redirect = client.get(f'/{code}')
+    assert redirect.status_code == 302
+    assert redirect.headers['Location'] == 'https://example.com/a/long/path?q=1'
+    assert client.get('/zzzzzzz').status_code == 404
@@ -0,0 +1,61 @@
+import pytest
+
+@pytest.mark.parametrize('url, media_id, kind', [
+    ('https://www.instagram.com/p/CxYz123AbC/', 'CxYz123AbC', 'post'),
+    ('https://instagram.com/reel/Cq9_kL-2xYz/?igsh=abc', 'Cq9_kL-2xYz', 'reel'),
+    ('https://www.instagram.com/someuser/p/CxYz123AbC/', 'CxYz123AbC', 'post'),
+    ('instagram.com/p/CxYz123AbC', 'CxYz123AbC', 'post'),
+])
+def test_instagram_accepts_post_and_reel_urls(client, api_headers, url, media_id, kind):
+    response = client.get('/api/instagram/download', query_string={'url': url}, headers=api_headers)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['media_id'], body['media_kind'], body['post_id']) == (media_id, kind, media_id)
+    assert body['original_url'] == url
+
+@pytest.mark.parametrize('url', [
+    'https://www.instagram.com/someuser/',
+    'https://www.tiktok.com/@user/video/7234567890123456789',
+    'not a url',
+])
+def test_instagram_rejects_other_urls(client, api_headers, url):
+    response = client.get('/api/instagram/download', query_string={'url': url}, headers=api_headers)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid Instagram URL'
+
+@pytest.mark.parametrize('platform, url, media_id, kind', [
+    ('tiktok', 'https://www.tiktok.com/@user/video/7234567890123456789?lang=en', '7234567890123456789', 'video'),
+    ('tiktok', 'https://vm.tiktok.com/ZMabc123/', 'ZMabc123', 'share'),
+    ('facebook', 'https://www.facebook.com/watch/?v=123456789012345', '123456789012345', 'video'),
+    ('facebook', 'https://fb.watch/abcDEF123/', 'abcDEF123', 'share'),
+    ('twitter', 'https://x.com/someone/status/1234567890123456789', '1234567890123456789', 'status'),
+    ('twitter', 'https://twitter.com/i/web/status/1234567890123456789', '1234567890123456789', 'status'),
+])
+def test_recognised_links_report_their_media_id(client, api_headers, platform, url, media_id, kind):
+    response = client.get(f'/api/{platform}/download', query_string={'url': url}, headers=api_headers)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['media_id'], body['media_kind']) == (media_id, kind)
+
+@pytest.mark.parametrize('platform', ['tiktok', 'facebook', 'twitter'])
+@pytest.mark.parametrize('url', [
+    'https://www.tiktok.com/@user',
+    'https://www.facebook.com/somepage',
+    'https://x.com/someone',
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+    'https://example.com/some/video',
+])
+def test_other_downloaders_still_accept_any_link(client, api_headers, platform, url):
+    # These endpoints accepted any URL before classify_url existed; unrecognised ones only lose media_id
+    response = client.get(f'/api/{platform}/download', query_string={'url': url}, headers=api_headers)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['success'] is True
+    assert body['original_url'] == url
+    assert body['download_services']
+    assert (body['media_id'], body['media_kind']) == (None, None)
+
+@pytest.mark.parametrize('platform', ['instagram', 'tiktok', 'facebook', 'twitter'])
+def test_url_is_required(client, api_headers, platform):
+    response = client.get(f'/api/{platform}/download', query_string={'url': '  '}, headers=api_headers)
+    assert response.status_code == 400
@@ -0,0 +1,32 @@
+import os
+import threading
+
+def test_ensure_starts_one_thread_per_process(app_module):
+    runs = []
+    ran = threading.Event()
+
+    def target():
+        runs.append(os.getpid())
+        ran.set()
+
+    worker = app_module.WorkerThread(target, 'test-worker')
+    for _ in range(3):
+        worker.ensure()
+    assert ran.wait(5)
+    assert runs == [os.getpid()]
+
+    # A forked child inherits the parent's pid record but not its thread
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        ran.clear()
+        worker.ensure()
+        worker.ensure()
+        ok = ran.wait(5) and runs[1:] == [os.getpid()]
+        os.write(write_fd, b'1' if ok else b'0')
+        os._exit(0)
+    os.close(write_fd)
+    assert os.read(read_fd, 1) == b'1'
+    os.waitpid(pid, 0)
+    os.close(read_fd)
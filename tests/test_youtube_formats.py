@@ -0,0 +1,60 @@
+import json
+import os
+
+import pytest
+
+VIDEO_ID = 'dQw4w9WgXcQ'
+STUCK_ID = 'stuckstuck1'
+
+FIXTURE = {
+    'title': 'Fixture video',
+    'duration': 212,
+    'formats': [
+        {'format_id': '18', 'ext': 'mp4', 'width': 640, 'height': 360, 'vcodec': 'avc1', 'acodec': 'mp4a',
+         'protocol': 'https', 'url': 'https://rr1.googlevideo.com/videoplayback?itag=18&expire=4102444800'},
+        {'format_id': '140', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a',
+         'protocol': 'https', 'url': 'https://rr1.googlevideo.com/videoplayback?itag=140&expire=4102444800'},
+        {'format_id': 'hls', 'ext': 'mp4', 'vcodec': 'avc1', 'protocol': 'm3u8_native',
+         'url': 'https://manifest.googlevideo.com/index.m3u8'},
+    ],
+}
+
+@pytest.fixture
+def fixture_dir(app_module, tmp_path, monkeypatch):
+    with open(tmp_path / f'{VIDEO_ID}.json', 'w') as f:
+        json.dump(FIXTURE, f)
+    # Opening a FIFO with no writer blocks, like an extraction that never returns
+    os.mkfifo(tmp_path / f'{STUCK_ID}.json')
+    monkeypatch.setitem(app_module.app.config, 'YTDLP_FIXTURE_DIR', str(tmp_path))
+    for video_id in (VIDEO_ID, STUCK_ID):
+        app_module.ytdlp_cache.delete(video_id)
+    return tmp_path
+
+def download(client, headers, video_id, format_type='mp4'):
+    response = client.get(
+        f'/api/youtube/download?url=https://youtu.be/{video_id}&format={format_type}', headers=headers
+    )
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_formats_come_from_the_fixture(client, api_headers, fixture_dir):
+    result = download(client, api_headers, VIDEO_ID)
+    assert result['title'] == 'Fixture video'
+    assert [fmt['itag'] for fmt in result['formats']] == ['18']
+    assert result['expires_at'] is not None
+    assert result['cached'] is False
+
+    assert download(client, api_headers, VIDEO_ID)['cached'] is True
+    assert [fmt['itag'] for fmt in download(client, api_headers, VIDEO_ID, 'mp3')['formats']] == ['140']
+
+def test_stuck_extraction_recycles_the_pool(app_module, client, api_headers, fixture_dir, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'YTDLP_TIMEOUT', 2)
+    stuck_pool = app_module.get_ytdlp_pool()
+
+    result = download(client, api_headers, STUCK_ID)
+    assert result['formats'] == []
+    assert result['extraction_error'] == 'TimeoutError'
+    assert app_module.get_ytdlp_pool() is not stuck_pool
+
+    # With the stuck process gone, the next extraction gets a worker again
+    assert download(client, api_headers, VIDEO_ID)['title'] == 'Fixture video'